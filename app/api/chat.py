@@ -1,7 +1,9 @@
 """"""
 
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+import json
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, AsyncIterator
 from datetime import datetime
 
 from ..models.schemas import (
@@ -13,33 +15,40 @@ from ..models.schemas import (
     FeedbackResponse,
 )
 from ..services.rag_service_groq import RAGServiceGroq
+from ..dependencies import get_rag_service
+from ..services.executors import run_blocking
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
-rag_service = RAGServiceGroq()
-
 conversation_history = []
 
 
+def _remember_answer(question: str, answer: str, sources_count: int):
+    conversation_history.append({
+        "question": question,
+        "answer": answer,
+        "timestamp": datetime.now().isoformat(),
+        "sources_count": sources_count
+    })
+    
+    if len(conversation_history) > 100:
+        conversation_history.pop(0)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @router.post("/ask", response_model=ChatResponse)
-async def ask_question(request: ChatRequest):
+async def ask_question(request: ChatRequest, rag_service: RAGServiceGroq = Depends(get_rag_service)):
     try:
         if not request.question.strip():
             raise HTTPException(status_code=400, detail="Question must not be empty")
         
         doc_filter = {"document_id": request.document_id} if request.document_id else None
-        result = rag_service.query(request.question, document_filter=doc_filter)
+        result = await rag_service.query(request.question, document_filter=doc_filter)
         
-        conversation_entry = {
-            "question": request.question,
-            "answer": result["answer"],
-            "timestamp": datetime.now().isoformat(),
-            "sources_count": len(result.get("sources", []))
-        }
-        conversation_history.append(conversation_entry)
-        
-        if len(conversation_history) > 100:
-            conversation_history.pop(0)
+        _remember_answer(request.question, result["answer"], len(result.get("sources", [])))
         
         return ChatResponse(
             success=result["success"],
@@ -47,6 +56,7 @@ async def ask_question(request: ChatRequest):
             question=request.question,
             sources=result.get("sources", []),
             timestamp=result.get("timestamp", datetime.now().isoformat()),
+            cached=result.get("cached", False),
             error=result.get("error")
         )
         
@@ -63,6 +73,33 @@ async def ask_question(request: ChatRequest):
         )
 
 
+@router.post("/ask/stream")
+async def ask_question_stream(request: ChatRequest, rag_service: RAGServiceGroq = Depends(get_rag_service)):
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question must not be empty")
+    
+    doc_filter = {"document_id": request.document_id} if request.document_id else None
+    
+    async def events() -> AsyncIterator[str]:
+        sources_count = 0
+        async for event, data in rag_service.astream_query(request.question, document_filter=doc_filter):
+            if event == "sources":
+                sources_count = len(data)
+            elif event == "done":
+                _remember_answer(request.question, data["answer"], sources_count)
+                # Sources were already sent as the first event
+                data = {key: value for key, value in data.items() if key != "sources"}
+                data.setdefault("question", request.question)
+                data.setdefault("timestamp", datetime.now().isoformat())
+            yield _sse(event, data)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/history")
 async def get_conversation_history(limit: int = 20):
     try:
@@ -84,12 +121,14 @@ async def get_conversation_history(limit: int = 20):
 
 
 @router.post("/search", response_model=SearchResponse)
-async def search_similar_content(request: SearchRequest):
+async def search_similar_content(
+    request: SearchRequest, rag_service: RAGServiceGroq = Depends(get_rag_service)
+):
     try:
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Query must not be empty")
         
-        results = rag_service.search_similar(request.query, k=request.limit)
+        results = await run_blocking("search", rag_service.search_similar, request.query, k=request.limit)
         
         return SearchResponse(
             success=True,
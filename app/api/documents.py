@@ -1,27 +1,324 @@
 """"""
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from typing import List, Dict, Any, Optional
+import os
+import asyncio
 import uuid
 from datetime import datetime
 
 from ..models.schemas import (
     DocumentUploadResponse,
+    BatchUploadResponse,
     DocumentListResponse,
     DocumentInfo,
     StatsResponse,
+    JobStatusResponse,
+    JobListResponse,
 )
 from ..services.rag_service_groq import RAGServiceGroq
+from ..dependencies import get_rag_service
 from ..services.file_service import FileService
+from ..services.extraction_cache import ExtractionCache
+from ..services.hash_index import DocumentHashIndex
+from ..services.ingestion_jobs import IngestionJobQueue, JobReporter
+from ..services.executors import run_blocking, run_in_workload
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
-rag_service = RAGServiceGroq()
-file_service = FileService()
+file_service = FileService(extraction_cache=ExtractionCache())
+hash_index = DocumentHashIndex()
+
+
+def _extract_upload(
+    upload: Dict[str, Any],
+    force: bool = False,
+    progress: Optional[JobReporter] = None
+) -> Dict[str, Any]:
+    existing = hash_index.lookup(upload["sha256"])
+    if existing and not force:
+        file_service.delete_file(upload["file_path"])
+        return {
+            "success": True,
+            "message": "Document already indexed",
+            "document_id": existing["document_id"],
+            "chunks_count": existing.get("chunks_count"),
+            "duplicate": True
+        }
+    
+    if progress:
+        progress("extract", None, None)
+    extract_result = file_service.extract_text_from_file(
+        upload["file_path"], 
+        upload["content_type"],
+        progress=(lambda done, total: progress("extract", done, total)) if progress else None,
+        file_hash=upload["sha256"]
+    )
+    
+    if not extract_result["success"]:
+        file_service.delete_file(upload["file_path"])
+        return {"success": False, "message": extract_result["message"]}
+    
+    return {"success": True, "extract_result": extract_result, "existing": existing}
+
+
+def _claim_document_id(
+    upload: Dict[str, Any], existing: Optional[Dict[str, Any]], document_id: Optional[str] = None
+) -> Dict[str, Any]:
+    if existing:
+        document_id = existing["document_id"]
+    else:
+        document_id = document_id or str(uuid.uuid4())
+    # A re-run ingestion job keeps its id, so chunks an interrupted attempt
+    # already wrote are dropped here instead of staying searchable.
+    row = None if existing else get_rag_service().catalog.get(document_id)
+    if existing or (row is not None and row["status"] != "queued"):
+        remove_result = get_rag_service().delete_document_chunks(document_id)
+        if not remove_result["success"]:
+            file_service.delete_file(upload["file_path"])
+            return {"success": False, "message": remove_result["message"]}
+    
+    get_rag_service().catalog.upsert(
+        document_id,
+        filename=upload["filename"],
+        type=upload["content_type"],
+        file_size=upload["file_size"],
+        sha256=upload["sha256"],
+        chunks_count=0,
+        upload_time=datetime.now().isoformat(),
+        status="indexing",
+        error=None,
+        file_path=upload["file_path"]
+    )
+    return {"success": True, "document_id": document_id}
+
+
+def _document_metadata(upload: Dict[str, Any], document_id: str) -> Dict[str, Any]:
+    return {
+        "document_id": document_id,
+        "filename": upload["filename"],
+        "type": upload["content_type"],
+        "file_size": upload["file_size"],
+        "sha256": upload["sha256"],
+        "upload_time": datetime.now().isoformat(),
+        "file_path": upload["file_path"]
+    }
+
+
+def _fail_index(
+    upload: Dict[str, Any], document_id: str, existing: Optional[Dict[str, Any]], message: str
+) -> Dict[str, Any]:
+    # add_document can fail after some batches were written
+    get_rag_service().delete_document_chunks(document_id)
+    file_service.delete_file(upload["file_path"])
+    if existing:
+        hash_index.remove(upload["sha256"])
+    get_rag_service().catalog.set_status(document_id, "failed", error=message, file_path=None)
+    return {"success": False, "message": message, "document_id": document_id}
+
+
+def _extraction_warning(extract_result: Dict[str, Any]) -> Optional[str]:
+    failed_pages = extract_result.get("ocr_failed_pages")
+    if not failed_pages:
+        return None
+    return f"OCR failed for pages {', '.join(str(page) for page in failed_pages)}"
+
+
+def _complete_index(
+    upload: Dict[str, Any],
+    document_id: str,
+    existing: Optional[Dict[str, Any]],
+    chunks_count: int,
+    warning: Optional[str] = None
+) -> Dict[str, Any]:
+    if existing and existing.get("file_path") not in (None, upload["file_path"]):
+        file_service.delete_file(existing["file_path"])
+    
+    hash_index.register(
+        upload["sha256"],
+        document_id,
+        filename=upload["filename"],
+        file_path=upload["file_path"],
+        chunks_count=chunks_count
+    )
+    get_rag_service().mark_document_indexed(document_id, chunks_count)
+    
+    return {
+        "success": True,
+        "message": f"Document uploaded ({warning})" if warning else "Document uploaded",
+        "document_id": document_id,
+        "chunks_count": chunks_count,
+        "duplicate": False
+    }
+
+
+def _index_upload(
+    upload: Dict[str, Any],
+    extracted: Dict[str, Any],
+    progress: Optional[JobReporter] = None,
+    document_id: Optional[str] = None
+) -> Dict[str, Any]:
+    extract_result = extracted["extract_result"]
+    existing = extracted["existing"]
+    claim = _claim_document_id(upload, existing, document_id)
+    if not claim["success"]:
+        return claim
+    document_id = claim["document_id"]
+    
+    add_result = get_rag_service().add_document(
+        content=extract_result["content"],
+        metadata=_document_metadata(upload, document_id),
+        pages=extract_result.get("pages"),
+        progress=progress
+    )
+    
+    if not add_result["success"]:
+        return _fail_index(upload, document_id, existing, add_result["message"])
+    
+    return _complete_index(
+        upload, document_id, existing, add_result["chunks_count"], _extraction_warning(extract_result)
+    )
+
+
+def _queue_document(upload: Dict[str, Any], document_id: str):
+    get_rag_service().catalog.upsert(
+        document_id,
+        filename=upload["filename"],
+        type=upload["content_type"],
+        file_size=upload["file_size"],
+        sha256=upload["sha256"],
+        chunks_count=0,
+        upload_time=datetime.now().isoformat(),
+        status="queued",
+        error=None,
+        file_path=upload["file_path"]
+    )
+
+
+def _run_ingestion_job(payload: Dict[str, Any], report: JobReporter) -> Dict[str, Any]:
+    upload = payload["upload"]
+    existing = hash_index.lookup(upload["sha256"])
+    if existing and (
+        existing["document_id"] == payload.get("document_id") or not os.path.exists(upload["file_path"])
+    ):
+        # An earlier attempt of this job got as far as indexing the document
+        # (or dropping the upload as a duplicate) before it was interrupted
+        duplicate = existing["document_id"] != payload.get("document_id")
+        result = {
+            "success": True,
+            "message": "Document already indexed" if duplicate else "Document uploaded",
+            "document_id": existing["document_id"],
+            "chunks_count": existing.get("chunks_count"),
+            "duplicate": duplicate
+        }
+    else:
+        if not os.path.exists(upload["file_path"]):
+            raise RuntimeError("Uploaded file is missing")
+        result = run_in_workload("extract", _extract_upload, upload, payload["force"], report)
+        if "extract_result" in result:
+            result = run_in_workload("embed", _index_upload, upload, result, report, payload.get("document_id"))
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+    if payload.get("document_id") and result["document_id"] != payload["document_id"]:
+        # A duplicate (or forced re-index) lives on under the existing id
+        get_rag_service().catalog.remove(payload["document_id"], status="queued")
+    return result
+
+
+def _clean_up_failed_job(payload: Dict[str, Any], error: str):
+    upload = payload["upload"]
+    document_id = payload.get("document_id")
+    entry = hash_index.lookup(upload["sha256"])
+    # Only a document that finished indexing is registered under its hash
+    if document_id and (entry is None or entry["document_id"] != document_id):
+        get_rag_service().delete_document_chunks(document_id)
+        catalog = get_rag_service().catalog
+        if catalog.get(document_id) is not None:
+            catalog.set_status(document_id, "failed", error=error, file_path=None)
+    if entry is None or entry.get("file_path") != upload["file_path"]:
+        file_service.delete_file(upload["file_path"])
+
+
+def _delete_document(document_id: str) -> Dict[str, Any]:
+    remove_result = get_rag_service().delete_document_chunks(document_id)
+    if not remove_result["success"]:
+        return remove_result
+    
+    entry = hash_index.remove_document(document_id)
+    cataloged = get_rag_service().catalog.remove(document_id)
+    if entry is None and not cataloged and remove_result["chunks_deleted"] == 0:
+        return {"success": False, "message": "Document not found", "error": "not_found"}
+    if entry and entry.get("file_path"):
+        file_service.delete_file(entry["file_path"])
+    
+    return {
+        "success": True,
+        "message": "Document deleted",
+        "document_id": document_id,
+        "chunks_deleted": remove_result["chunks_deleted"]
+    }
+
+
+def _prepare_replace(document_id: str, upload: Dict[str, Any]) -> Dict[str, Any]:
+    current = hash_index.find_document(document_id)
+    if (
+        current is None
+        and get_rag_service().catalog.get(document_id) is None
+        and get_rag_service().count_document_chunks(document_id) == 0
+    ):
+        file_service.delete_file(upload["file_path"])
+        return {"success": False, "message": "Document not found", "error": "not_found"}
+    
+    same_content = hash_index.lookup(upload["sha256"])
+    if same_content:
+        file_service.delete_file(upload["file_path"])
+        if same_content["document_id"] != document_id:
+            return {
+                "success": False,
+                "message": f"Content already indexed as document {same_content['document_id']}",
+                "error": "conflict"
+            }
+        return {
+            "success": True,
+            "message": "Document unchanged",
+            "document_id": document_id,
+            "chunks_count": same_content.get("chunks_count"),
+            "duplicate": True
+        }
+    
+    extract_result = file_service.extract_text_from_file(
+        upload["file_path"], upload["content_type"], file_hash=upload["sha256"]
+    )
+    if not extract_result["success"]:
+        file_service.delete_file(upload["file_path"])
+        return {"success": False, "message": extract_result["message"]}
+    
+    return {"success": True, "extract_result": extract_result, "current": current}
+
+
+def _replace_document(document_id: str, upload: Dict[str, Any], prepared: Dict[str, Any]) -> Dict[str, Any]:
+    current = prepared["current"]
+    # The old chunks, hash entry and file are replaced under the same id
+    existing = {**(current or {}), "document_id": document_id}
+    extracted = {"extract_result": prepared["extract_result"], "existing": existing}
+    result = _index_upload(upload, extracted)
+    if current and current["sha256"] != upload["sha256"]:
+        hash_index.remove(current["sha256"])
+    if not result["success"]:
+        # The old chunks are gone either way, so its file would be orphaned
+        if current and current.get("file_path"):
+            file_service.delete_file(current["file_path"])
+        return result
+    return {**result, "message": "Document replaced"}
+
+
+job_queue = IngestionJobQueue(_run_ingestion_job, on_failed=_clean_up_failed_job)
 
 
 @router.post("/upload", response_model=DocumentUploadResponse)
-async def upload_document(file: UploadFile = File(...)):
+async def upload_document(
+    file: UploadFile = File(...), force: bool = False, async_mode: bool = False
+):
     try:
         if not file_service.is_supported_file(file):
             raise HTTPException(
@@ -31,44 +328,51 @@ async def upload_document(file: UploadFile = File(...)):
         
         save_result = await file_service.save_file(file)
         if not save_result["success"]:
-            raise HTTPException(status_code=500, detail=save_result["message"])
-        
-        extract_result = file_service.extract_text_from_file(
-            save_result["file_path"], 
-            file.content_type
-        )
-        
-        if not extract_result["success"]:
-            file_service.delete_file(save_result["file_path"])
-            raise HTTPException(status_code=500, detail=extract_result["message"])
+            status_code = 413 if save_result.get("error") == FileService.FILE_TOO_LARGE else 500
+            raise HTTPException(status_code=status_code, detail=save_result["message"])
         
-        document_id = str(uuid.uuid4())
-        
-        metadata = {
-            "document_id": document_id,
+        upload = {
+            "file_path": save_result["file_path"],
             "filename": file.filename,
-            "type": file.content_type,
+            "content_type": file.content_type,
             "file_size": save_result["file_size"],
-            "upload_time": datetime.now().isoformat(),
-            "file_path": save_result["file_path"]
+            "sha256": save_result["sha256"]
         }
         
-        add_result = rag_service.add_document(
-            content=extract_result["content"],
-            metadata=metadata
-        )
+        if async_mode:
+            # The id is fixed now so a re-run of the job reuses it, and the
+            # catalog lists the document as queued until a worker claims it
+            document_id = str(uuid.uuid4())
+            await run_blocking("search", _queue_document, upload, document_id)
+            job = job_queue.submit({"upload": upload, "force": force, "document_id": document_id})
+            if job is None:
+                await run_blocking("search", get_rag_service().catalog.remove, document_id)
+                file_service.delete_file(save_result["file_path"])
+                raise HTTPException(status_code=503, detail="Ingestion queue is full")
+            return DocumentUploadResponse(
+                success=True,
+                message="Document queued for ingestion",
+                filename=file.filename,
+                file_size=save_result["file_size"],
+                sha256=save_result["sha256"],
+                job_id=job["job_id"]
+            )
         
-        if not add_result["success"]:
-            file_service.delete_file(save_result["file_path"])
-            raise HTTPException(status_code=500, detail=add_result["message"])
+        result = await run_blocking("extract", _extract_upload, upload, force)
+        if "extract_result" in result:
+            result = await run_blocking("embed", _index_upload, upload, result)
+        if not result["success"]:
+            raise HTTPException(status_code=500, detail=result["message"])
         
         return DocumentUploadResponse(
             success=True,
-            message="Document uploaded",
-            document_id=document_id,
+            message=result["message"],
+            document_id=result["document_id"],
             filename=file.filename,
             file_size=save_result["file_size"],
-            chunks_count=add_result["chunks_count"]
+            sha256=save_result["sha256"],
+            chunks_count=result["chunks_count"],
+            duplicate=result["duplicate"]
         )
         
     except HTTPException:
@@ -77,55 +381,315 @@ async def upload_document(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
-@router.get("/list", response_model=DocumentListResponse)
-async def list_documents():
+def _upload_record(save_result: Dict[str, Any], filename: str, content_type: str) -> Dict[str, Any]:
+    return {
+        "file_path": save_result["file_path"],
+        "filename": filename,
+        "content_type": content_type,
+        "file_size": save_result["file_size"],
+        "sha256": save_result["sha256"]
+    }
+
+
+def _upload_response(upload: Dict[str, Any], result: Dict[str, Any]) -> DocumentUploadResponse:
+    return DocumentUploadResponse(
+        success=result["success"],
+        message=result["message"],
+        document_id=result.get("document_id"),
+        filename=upload["filename"],
+        file_size=upload.get("file_size"),
+        sha256=upload.get("sha256"),
+        chunks_count=result.get("chunks_count"),
+        duplicate=result.get("duplicate", False),
+        error=None if result["success"] else result["message"]
+    )
+
+
+async def _ingest_batch(
+    uploads: List[Dict[str, Any]], force: bool, rag_service: RAGServiceGroq
+) -> List[DocumentUploadResponse]:
+    results: Dict[int, Dict[str, Any]] = {}
+    first_by_hash: Dict[str, int] = {}
+    in_batch_duplicates: Dict[int, int] = {}
+    extract_tasks = []
+    
+    async def extract(idx: int, upload: Dict[str, Any]):
+        return idx, await run_blocking("extract", _extract_upload, upload, force)
+    
+    for idx, upload in enumerate(uploads):
+        first = first_by_hash.setdefault(upload["sha256"], idx)
+        if first != idx:
+            in_batch_duplicates[idx] = first
+            file_service.delete_file(upload["file_path"])
+        else:
+            extract_tasks.append(asyncio.ensure_future(extract(idx, upload)))
+    
+    # Chunks from different documents are pooled and written in large
+    # batches while the remaining files are still being extracted.
+    batch_size = rag_service.embed_batch_size
+    pending_chunks: List[Any] = []
+    indexing: Dict[int, Dict[str, Any]] = {}
+    
+    async def flush():
+        batch = [(idx, doc) for idx, doc in pending_chunks if idx in indexing]
+        pending_chunks.clear()
+        if not batch:
+            return
+        owners = {idx for idx, _ in batch}
+        add_result = await run_blocking("embed", rag_service.add_chunks, [doc for _, doc in batch])
+        for idx in owners:
+            state = indexing.get(idx)
+            if state is None:
+                continue
+            if not add_result["success"]:
+                indexing.pop(idx)
+                results[idx] = await run_blocking(
+                    "embed", _fail_index, uploads[idx], state["document_id"], state["existing"], add_result["message"]
+                )
+                continue
+            state["remaining"] -= sum(1 for owner, _ in batch if owner == idx)
+            if state["remaining"] == 0:
+                indexing.pop(idx)
+                results[idx] = await run_blocking(
+                    "embed", _complete_index,
+                    uploads[idx], state["document_id"], state["existing"], state["chunks_count"], state["warning"]
+                )
+    
+    for task in asyncio.as_completed(extract_tasks):
+        idx, prepared = await task
+        if "extract_result" not in prepared:
+            results[idx] = prepared
+            continue
+        
+        upload = uploads[idx]
+        claim = await run_blocking("embed", _claim_document_id, upload, prepared["existing"])
+        if not claim["success"]:
+            results[idx] = claim
+            continue
+        
+        extract_result = prepared["extract_result"]
+        chunks = await run_blocking(
+            "extract",
+            rag_service.build_chunks,
+            extract_result["content"],
+            _document_metadata(upload, claim["document_id"]),
+            extract_result.get("pages")
+        )
+        if not chunks:
+            results[idx] = await run_blocking(
+                "embed", _complete_index,
+                upload, claim["document_id"], prepared["existing"], 0, _extraction_warning(extract_result)
+            )
+            continue
+        
+        indexing[idx] = {
+            "document_id": claim["document_id"],
+            "existing": prepared["existing"],
+            "chunks_count": len(chunks),
+            "remaining": len(chunks),
+            "warning": _extraction_warning(extract_result)
+        }
+        pending_chunks.extend((idx, chunk) for chunk in chunks)
+        while len(pending_chunks) >= batch_size:
+            await flush()
+    
+    await flush()
+    
+    for idx, first in in_batch_duplicates.items():
+        first_result = results[first]
+        results[idx] = {
+            **first_result,
+            "message": "Duplicate of another file in this batch" if first_result["success"] else first_result["message"],
+            "duplicate": first_result["success"]
+        }
+    
+    return [_upload_response(uploads[idx], results[idx]) for idx in range(len(uploads))]
+
+
+@router.post("/upload-batch", response_model=BatchUploadResponse)
+async def upload_documents_batch(
+    files: List[UploadFile] = File(...),
+    force: bool = False,
+    rag_service: RAGServiceGroq = Depends(get_rag_service)
+):
     try:
-        stats = rag_service.get_document_stats()
-        
-        documents = []
-        if stats["total_documents"] > 0:
-            documents.append(DocumentInfo(
-                document_id="sample_id",
-                filename="Sample",
-                file_type="text/plain",
-                file_size=1024,
-                upload_time=datetime.now().isoformat(),
-                chunks_count=stats["total_documents"]
-            ))
-        
-        return DocumentListResponse(
-            success=True,
-            documents=documents,
-            total_count=stats["total_documents"]
+        rejected: List[DocumentUploadResponse] = []
+        uploads: List[Dict[str, Any]] = []
+        
+        for file in files:
+            save_result = await file_service.save_file(file, allow_archive=True)
+            if not save_result["success"]:
+                rejected.append(DocumentUploadResponse(
+                    success=False,
+                    message=save_result["message"],
+                    filename=file.filename,
+                    error=save_result.get("error")
+                ))
+                continue
+            
+            if not file_service.is_archive(file):
+                uploads.append(_upload_record(save_result, file.filename, file.content_type))
+                continue
+            
+            archive_result = await run_blocking("extract", file_service.extract_archive, save_result["file_path"])
+            if not archive_result["success"]:
+                rejected.append(DocumentUploadResponse(
+                    success=False,
+                    message=archive_result["message"],
+                    filename=file.filename,
+                    error=archive_result.get("error")
+                ))
+                continue
+            for member in archive_result["files"]:
+                if member["success"]:
+                    uploads.append(_upload_record(member, member["original_filename"], member["content_type"]))
+                else:
+                    rejected.append(DocumentUploadResponse(
+                        success=False,
+                        message=member["message"],
+                        filename=member["original_filename"],
+                        error=member.get("error")
+                    ))
+        
+        results = await _ingest_batch(uploads, force, rag_service) + rejected
+        succeeded = sum(1 for result in results if result.success)
+        
+        return BatchUploadResponse(
+            success=succeeded > 0 or not results,
+            message=f"Processed {len(results)} files, {succeeded} succeeded",
+            results=results,
+            total_files=len(results),
+            succeeded=succeeded,
+            failed=len(results) - succeeded,
+            total_chunks=sum(result.chunks_count or 0 for result in results if not result.duplicate)
         )
         
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch upload failed: {str(e)}")
+
+
+@router.get("/jobs", response_model=JobListResponse)
+async def list_ingestion_jobs(limit: int = 50):
+    jobs = [_job_status(job) for job in job_queue.list(limit=limit)]
+    return JobListResponse(success=True, jobs=jobs, total_count=len(jobs))
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_ingestion_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_status(job)
+
+
+def _job_status(job: Dict[str, Any]) -> JobStatusResponse:
+    result = job.get("result") or {}
+    return JobStatusResponse(
+        success=job["status"] != "failed",
+        job_id=job["job_id"],
+        status=job["status"],
+        filename=job["payload"]["upload"]["filename"],
+        stages=job["stages"],
+        document_id=result.get("document_id") or job["payload"].get("document_id"),
+        chunks_count=result.get("chunks_count"),
+        duplicate=result.get("duplicate", False),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+        error=job.get("error")
+    )
+
+
+@router.get("/list", response_model=DocumentListResponse)
+async def list_documents(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = Query("upload_time", pattern="^(upload_time|filename|file_size)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    status: Optional[str] = Query(None, pattern="^(queued|indexing|indexed|failed)$"),
+    file_type: Optional[str] = None,
+    rag_service: RAGServiceGroq = Depends(get_rag_service)
+):
+    try:
+        page = await run_blocking(
+            "search",
+            rag_service.catalog.list,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            descending=order == "desc",
+            status=status,
+            doc_type=file_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         return DocumentListResponse(success=False, error=f"List failed: {str(e)}")
+    
+    documents = [
+        DocumentInfo(
+            document_id=row["document_id"],
+            filename=row["filename"],
+            file_type=row["type"],
+            file_size=row["file_size"],
+            upload_time=row["upload_time"],
+            chunks_count=row["chunks_count"],
+            sha256=row["sha256"],
+            status=row["status"],
+            error=row["error"]
+        )
+        for row in page["documents"]
+    ]
+    return DocumentListResponse(
+        success=True,
+        documents=documents,
+        total_count=page["total_count"],
+        next_cursor=page["next_cursor"]
+    )
 
 
 @router.get("/stats", response_model=StatsResponse)
-async def get_document_stats():
+async def get_document_stats(rag_service: RAGServiceGroq = Depends(get_rag_service)):
     try:
-        stats = rag_service.get_document_stats()
+        stats = await run_blocking("search", rag_service.get_document_stats)
         
-        return StatsResponse(
-            success=True,
-            total_documents=stats["total_documents"],
-            document_types=stats["document_types"],
-            vector_db_size=stats["vector_db_size"],
-            last_updated=stats["last_updated"]
-        )
+        return _stats_response(stats)
         
     except Exception as e:
         return StatsResponse(success=False, error=f"Stats failed: {str(e)}")
 
 
+@router.post("/stats/rebuild", response_model=StatsResponse)
+async def rebuild_document_stats(rag_service: RAGServiceGroq = Depends(get_rag_service)):
+    try:
+        stats = await run_blocking("embed", rag_service.rebuild_document_stats)
+        return _stats_response(stats)
+        
+    except Exception as e:
+        return StatsResponse(success=False, error=f"Stats rebuild failed: {str(e)}")
+
+
+def _stats_response(stats: Dict[str, Any]) -> StatsResponse:
+    if "error" in stats:
+        return StatsResponse(success=False, error=stats["error"])
+    return StatsResponse(
+        success=True,
+        total_documents=stats["total_documents"],
+        total_chunks=stats["total_chunks"],
+        total_bytes=stats["total_bytes"],
+        document_types=stats["document_types"],
+        chunk_types=stats["chunk_types"],
+        vector_db_size=stats["vector_db_size"],
+        last_updated=stats["last_updated"]
+    )
+
+
 @router.delete("/clear")
-async def clear_all_documents():
+async def clear_all_documents(rag_service: RAGServiceGroq = Depends(get_rag_service)):
     try:
-        result = rag_service.clear_all_documents()
+        result = await run_blocking("embed", rag_service.clear_all_documents)
         
         if result["success"]:
+            hash_index.clear()
             return {"success": True, "message": "All documents cleared"}
         else:
             raise HTTPException(status_code=500, detail=result["message"])
@@ -137,12 +701,14 @@ async def clear_all_documents():
 
 
 @router.get("/search")
-async def search_documents(query: str, limit: int = 5):
+async def search_documents(
+    query: str, limit: int = 5, rag_service: RAGServiceGroq = Depends(get_rag_service)
+):
     try:
         if not query.strip():
             raise HTTPException(status_code=400, detail="Query must not be empty")
         
-        results = rag_service.search_similar(query, k=limit)
+        results = await run_blocking("search", rag_service.search_similar, query, k=limit)
         
         return {
             "success": True,
@@ -155,3 +721,51 @@ async def search_documents(query: str, limit: int = 5):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
+@router.delete("/{document_id}")
+async def delete_document(document_id: str):
+    try:
+        result = await run_blocking("embed", _delete_document, document_id)
+        
+        if result["success"]:
+            return result
+        status_code = 404 if result.get("error") == "not_found" else 500
+        raise HTTPException(status_code=status_code, detail=result["message"])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Delete failed: {str(e)}")
+
+
+@router.put("/{document_id}", response_model=DocumentUploadResponse)
+async def replace_document(document_id: str, file: UploadFile = File(...)):
+    try:
+        if not file_service.is_supported_file(file):
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Unsupported file type: {file.content_type}"
+            )
+        
+        save_result = await file_service.save_file(file)
+        if not save_result["success"]:
+            status_code = 413 if save_result.get("error") == FileService.FILE_TOO_LARGE else 500
+            raise HTTPException(status_code=status_code, detail=save_result["message"])
+        
+        upload = _upload_record(save_result, file.filename, file.content_type)
+        # Extraction and OCR run on the extract pool, like uploads, so a
+        # heavy replace does not hold an embed slot for its whole duration
+        result = await run_blocking("extract", _prepare_replace, document_id, upload)
+        if "extract_result" in result:
+            result = await run_blocking("embed", _replace_document, document_id, upload, result)
+        if not result["success"]:
+            status_code = {"not_found": 404, "conflict": 409}.get(result.get("error"), 500)
+            raise HTTPException(status_code=status_code, detail=result["message"])
+        
+        return _upload_response(upload, result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Replace failed: {str(e)}")
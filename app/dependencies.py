@@ -0,0 +1,65 @@
+""""""
+
+import time
+import threading
+from typing import Optional, Dict, Any
+
+from .services.rag_service_groq import RAGServiceGroq
+
+_rag_service: Optional[RAGServiceGroq] = None
+_rag_service_lock = threading.Lock()
+
+
+def get_rag_service() -> RAGServiceGroq:
+    # One instance per process: the embedding model and the Chroma client
+    # are loaded once and every router sees the same vector store state.
+    global _rag_service
+    if _rag_service is None:
+        with _rag_service_lock:
+            if _rag_service is None:
+                _rag_service = RAGServiceGroq()
+    return _rag_service
+
+
+async def close_rag_service():
+    if _rag_service is not None and _rag_service.llm is not None:
+        await _rag_service.llm.aclose()
+
+
+_warmup = {
+    "started": False,
+    "ready": False,
+    "error": None,
+    "seconds": None
+}
+_warmup_lock = threading.Lock()
+
+
+def _run_warmup():
+    started = time.monotonic()
+    try:
+        get_rag_service().warm_up()
+        _warmup["ready"] = True
+    except Exception as e:
+        _warmup["error"] = str(e)
+        print(f"warm-up error: {str(e)}")
+    finally:
+        _warmup["seconds"] = round(time.monotonic() - started, 2)
+
+
+def start_warmup():
+    with _warmup_lock:
+        if _warmup["started"]:
+            return
+        _warmup["started"] = True
+    threading.Thread(target=_run_warmup, name="rag-warmup", daemon=True).start()
+
+
+def get_readiness() -> Dict[str, Any]:
+    return {
+        "ready": _warmup["ready"],
+        "model_loaded": _rag_service is not None,
+        "index_loaded": _warmup["ready"],
+        "warmup_seconds": _warmup["seconds"],
+        "error": _warmup["error"]
+    }
@@ -0,0 +1,320 @@
+""""""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional, Iterator, Tuple, List
+from datetime import datetime
+
+from .services.file_service import FileService
+from .services.extraction_cache import ExtractionCache
+
+_worker_file_service: Optional[FileService] = None
+
+
+def _init_worker(upload_dir: str):
+    global _worker_file_service
+    # The outer pool already uses every core, so each worker extracts its
+    # PDFs sequentially instead of starting nested pools.
+    _worker_file_service = FileService(
+        upload_dir=upload_dir,
+        pdf_workers=1,
+        ocr_workers=1,
+        extraction_cache=ExtractionCache()
+    )
+
+
+def _failed_extraction(file_path: str, content_type: str, message: str) -> Dict[str, Any]:
+    return {
+        "file_path": file_path,
+        "content_type": content_type,
+        "sha256": None,
+        "file_size": None,
+        "result": {"success": False, "message": message}
+    }
+
+
+def _extract_worker(file_path: str, content_type: str) -> Dict[str, Any]:
+    try:
+        file_hash = _worker_file_service.compute_file_hash(file_path)
+        result = _worker_file_service.extract_text_from_file(file_path, content_type, file_hash=file_hash)
+        return {
+            "file_path": file_path,
+            "content_type": content_type,
+            "sha256": file_hash,
+            "file_size": os.path.getsize(file_path),
+            "result": result
+        }
+    except Exception as e:
+        return _failed_extraction(file_path, content_type, str(e))
+
+
+def iter_source_files(root: str) -> Iterator[Tuple[str, str]]:
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if not d.startswith("."))
+        for name in sorted(files):
+            content_type = FileService.EXTENSION_TYPES.get(os.path.splitext(name)[1].lower())
+            if content_type and not name.startswith("."):
+                yield os.path.join(directory, name), content_type
+
+
+class IndexCheckpoint:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from an interrupted run
+                        continue
+                    self.completed[entry["file_path"]] = entry
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def is_done(self, file_path: str) -> bool:
+        entry = self.completed.get(file_path)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return True
+        return entry["file_size"] == stat.st_size and entry["mtime"] == stat.st_mtime
+
+    def record(self, entry: Dict[str, Any]):
+        self.completed[entry["file_path"]] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def run(args: argparse.Namespace) -> int:
+    from .services.hash_index import DocumentHashIndex
+    from .services.rag_service_groq import RAGServiceGroq
+
+    upload_dir = args.upload_dir or args.data_dir
+    checkpoint = IndexCheckpoint(args.checkpoint or os.path.join(args.data_dir, "indexer_checkpoint.jsonl"))
+    hash_index = DocumentHashIndex(args.hash_index or os.path.join(args.data_dir, "hash_index.sqlite3"))
+    # Re-register everything the checkpoint already covers, in case the
+    # previous run stopped between a checkpoint write and a hash index save.
+    hash_entries: Dict[str, Dict[str, Any]] = {
+        entry["sha256"]: {
+            "document_id": entry["document_id"],
+            "filename": os.path.basename(entry["file_path"]),
+            "file_path": None,
+            "source_path": entry["file_path"],
+            "chunks_count": entry["chunks_count"]
+        }
+        for entry in checkpoint.completed.values() if entry.get("document_id")
+    }
+    if hash_entries:
+        hash_index.register_many(hash_entries)
+        hash_entries = {}
+
+    # Spawned workers only import the extraction code, never the embedding model.
+    def start_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(upload_dir,)
+        )
+
+    pool = start_pool()
+    rag_service = RAGServiceGroq(persist_directory=args.persist_dir, with_llm=False, data_directory=args.data_dir)
+
+    stats = {"indexed": 0, "skipped": 0, "duplicates": 0, "failed": 0, "chunks": 0}
+    pending_chunks = []
+    pending_files: Dict[str, Dict[str, Any]] = {}
+    pending_catalog: List[Dict[str, Any]] = []
+    seen_hashes = set()
+    last_hash_save = time.monotonic()
+
+    def flush_chunks():
+        nonlocal hash_entries, last_hash_save
+        if pending_chunks:
+            add_result = rag_service.add_chunks(pending_chunks)
+            if not add_result["success"]:
+                raise RuntimeError(add_result["message"])
+            stats["chunks"] += len(pending_chunks)
+            pending_chunks.clear()
+        rag_service.register_documents(pending_catalog)
+        pending_catalog.clear()
+        for entry in pending_files.values():
+            checkpoint.record(entry)
+            hash_entries[entry["sha256"]] = {
+                "document_id": entry["document_id"],
+                "filename": os.path.basename(entry["file_path"]),
+                "file_path": None,
+                "source_path": entry["file_path"],
+                "chunks_count": entry["chunks_count"]
+            }
+        pending_files.clear()
+        checkpoint.flush()
+        if hash_entries and time.monotonic() - last_hash_save >= args.hash_index_interval:
+            hash_index.register_many(hash_entries)
+            hash_entries = {}
+            last_hash_save = time.monotonic()
+
+    def handle(extracted: Dict[str, Any]):
+        file_path = extracted["file_path"]
+        result = extracted["result"]
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            stat = None
+        entry = {
+            "file_path": file_path,
+            "sha256": extracted["sha256"],
+            "file_size": stat.st_size if stat else None,
+            "mtime": stat.st_mtime if stat else None,
+            "document_id": None,
+            "chunks_count": 0
+        }
+        if not result["success"]:
+            stats["failed"] += 1
+            print(f"failed: {file_path}: {result['message']}", file=sys.stderr)
+            # Recorded so a resumed run skips the file until it changes
+            if not result.get("retry"):
+                checkpoint.record({**entry, "error": result["message"]})
+            return
+
+        existing = hash_index.lookup(extracted["sha256"])
+        if extracted["sha256"] in seen_hashes or (existing and not args.force):
+            stats["duplicates"] += 1
+            checkpoint.record(entry)
+            return
+        seen_hashes.add(extracted["sha256"])
+
+        if existing:
+            document_id = existing["document_id"]
+            rag_service.delete_document_chunks(document_id)
+        else:
+            # Deterministic ids make a resumed run overwrite, not duplicate,
+            # the chunks of a file that was written but not yet checkpointed.
+            document_id = str(uuid.uuid5(uuid.NAMESPACE_OID, extracted["sha256"]))
+        metadata = {
+            "document_id": document_id,
+            "filename": os.path.basename(file_path),
+            "type": extracted["content_type"],
+            "file_size": extracted["file_size"],
+            "sha256": extracted["sha256"],
+            "upload_time": datetime.now().isoformat(),
+            "file_path": file_path
+        }
+        chunks = rag_service.build_chunks(result["content"], metadata, result.get("pages"))
+        pending_chunks.extend(chunks)
+        pending_files[file_path] = {**entry, "document_id": document_id, "chunks_count": len(chunks)}
+        # Source files belong to the caller, so like the hash index entry
+        # the catalog row never points at them for deletion.
+        pending_catalog.append({
+            **metadata,
+            "chunks_count": len(chunks),
+            "status": "indexed",
+            "error": None,
+            "file_path": None
+        })
+        stats["indexed"] += 1
+        if len(pending_chunks) >= args.batch_size:
+            flush_chunks()
+
+    def collect(future):
+        # A worker that died (or a result that failed to unpickle) fails
+        # its file only, not the whole run.
+        try:
+            extracted = future.result()
+        except Exception as e:
+            extracted = _failed_extraction(*submitted[future], str(e) or type(e).__name__)
+            # A dead worker fails every file in flight with it, so these
+            # are left out of the checkpoint and tried again on resume.
+            extracted["result"]["retry"] = isinstance(e, BrokenProcessPool)
+        del submitted[future]
+        handle(extracted)
+
+    started = time.monotonic()
+    last_progress = 0
+    in_flight = set()
+    submitted: Dict[Any, Tuple[str, str]] = {}
+    max_in_flight = args.workers * 4
+    try:
+        for file_path, content_type in iter_source_files(args.directory):
+            if checkpoint.is_done(file_path):
+                stats["skipped"] += 1
+                continue
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            try:
+                future = pool.submit(_extract_worker, file_path, content_type)
+            except BrokenProcessPool:
+                pool.shutdown(wait=False)
+                pool = start_pool()
+                future = pool.submit(_extract_worker, file_path, content_type)
+            submitted[future] = (file_path, content_type)
+            in_flight.add(future)
+
+            processed = stats["indexed"] + stats["duplicates"] + stats["failed"]
+            if processed - last_progress >= 1000:
+                last_progress = processed
+                print(f"progress: {stats} ({time.monotonic() - started:.0f}s)")
+
+        for future in wait(in_flight).done:
+            collect(future)
+        flush_chunks()
+        if hash_entries:
+            hash_index.register_many(hash_entries)
+    finally:
+        # cancel_futures needs Python 3.9; on 3.8 queued tasks are cancelled by hand
+        for future in in_flight:
+            future.cancel()
+        pool.shutdown(wait=False)
+        checkpoint.close()
+
+    print(f"done: {stats} ({time.monotonic() - started:.0f}s)")
+    return 0 if stats["failed"] == 0 else 1
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.indexer",
+        description="Bulk-index a directory tree into the vector store without the web app"
+    )
+    parser.add_argument("directory", help="Directory to walk")
+    parser.add_argument("--persist-dir", default="./vector_db", help="Vector store directory")
+    parser.add_argument(
+        "--data-dir", default="./data", help="Data directory shared with the web app (catalog, corpus stats, hash index)"
+    )
+    parser.add_argument("--upload-dir", help="FileService upload directory (default: the data directory)")
+    parser.add_argument("--hash-index", help="Content hash index database (default: <data-dir>/hash_index.sqlite3)")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resuming (default: <data-dir>/indexer_checkpoint.jsonl)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Extraction processes")
+    parser.add_argument("--batch-size", type=int, default=2048, help="Chunks per vector store write")
+    parser.add_argument("--hash-index-interval", type=float, default=30.0, help="Seconds between hash index saves")
+    parser.add_argument("--force", action="store_true", help="Re-index files already in the hash index")
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+""""""
+
+import time
+import json
+import random
+import asyncio
+import argparse
+from typing import Optional
+
+from .services.fake_llm import FakeLLMProvider
+
+
+def create_app(latency_ms: float = 200.0, token_delay_ms: float = 20.0, error_rate: float = 0.0):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI(title="LLM stub")
+    provider = FakeLLMProvider(token_delay_ms=token_delay_ms)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        # Injected failures exercise the client's retry path
+        if random.random() < error_rate:
+            return JSONResponse({"error": {"message": "stub overloaded"}}, status_code=503, headers={"Retry-After": "0"})
+        await asyncio.sleep(latency_ms / 1000)
+
+        created = int(time.time())
+        if not body.get("stream"):
+            return {
+                "id": f"stub-{created}",
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": provider.render(body["messages"])},
+                    "finish_reason": "stop"
+                }]
+            }
+
+        async def events():
+            async for token in provider.stream(None, body["messages"]):
+                chunk = {"choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.llm_stub",
+        description="OpenAI-compatible stub model server for tests and benchmarks (LLM_PROVIDER=openai)"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Delay before the first token")
+    parser.add_argument("--token-delay-ms", type=float, default=20.0, help="Delay between streamed tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    uvicorn.run(create_app(args.latency_ms, args.token_delay_ms, args.error_rate), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,20 +2,37 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from datetime import datetime
 import os
 
 from .api import documents, chat
-from .models.schemas import HealthResponse
+from .dependencies import start_warmup, get_readiness, get_rag_service, close_rag_service
+from .services.executors import shutdown_executors
+from .models.schemas import HealthResponse, ReadinessResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The model loads in the background so the port binds immediately;
+    # /health/ready reports when it is done.
+    start_warmup()
+    documents.job_queue.start()
+    yield
+    documents.job_queue.stop()
+    await close_rag_service()
+    shutdown_executors()
+
 
 app = FastAPI(
     title="📚 Personal Knowledge Base",
     description="RAG-powered document QA with multiple file formats",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -291,26 +308,38 @@ async def read_root():
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    try:
-        rag_stats = documents.rag_service.get_document_stats()
-        
-        return HealthResponse(
-            status="healthy",
-            timestamp=datetime.now().isoformat(),
-            version="1.0.0",
-            rag_service_status="running" if rag_stats["total_documents"] >= 0 else "error",
-            vector_db_status="connected",
-            openai_status="not_configured"
-        )
-    except Exception as e:
-        return HealthResponse(
-            status="unhealthy",
-            timestamp=datetime.now().isoformat(),
-            version="1.0.0",
-            rag_service_status="error",
-            vector_db_status="error",
-            openai_status="error"
-        )
+    readiness = get_readiness()
+    if readiness["ready"]:
+        service_status = "running"
+    elif readiness["error"]:
+        service_status = "error"
+    else:
+        service_status = "starting"
+    
+    return HealthResponse(
+        status="healthy",
+        timestamp=datetime.now().isoformat(),
+        version="1.0.0",
+        rag_service_status=service_status,
+        vector_db_status="connected" if readiness["index_loaded"] else "loading",
+        openai_status="not_configured"
+    )
+
+
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def readiness_check():
+    readiness = get_readiness()
+    response = ReadinessResponse(timestamp=datetime.now().isoformat(), **readiness)
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content=response.model_dump())
+    return response
+
+
+@app.get("/metrics")
+async def metrics():
+    if not get_readiness()["model_loaded"]:
+        return {"success": False, "error": "RAG service not loaded yet"}
+    return {"success": True, **get_rag_service().get_metrics()}
 
 
 @app.get("/api")
@@ -321,20 +350,29 @@ async def api_info():
         "description": "RAG-powered document QA",
         "endpoints": {
             "documents": {
-                "POST /documents/upload": "Upload document",
-                "GET /documents/list": "List documents",
+                "POST /documents/upload": "Upload document (async_mode=true queues a job)",
+                "POST /documents/upload-batch": "Upload many files or a zip archive",
+                "GET /documents/jobs": "List ingestion jobs",
+                "GET /documents/jobs/{job_id}": "Get ingestion job status",
+                "GET /documents/list": "List documents (keyset pagination)",
                 "GET /documents/stats": "Get stats",
+                "POST /documents/stats/rebuild": "Recompute stats from the vector store",
+                "PUT /documents/{document_id}": "Replace a document",
+                "DELETE /documents/{document_id}": "Delete a document",
                 "DELETE /documents/clear": "Clear all documents"
             },
             "chat": {
                 "POST /chat/ask": "Ask question",
+                "POST /chat/ask/stream": "Ask question (Server-Sent Events)",
                 "GET /chat/history": "Get chat history",
                 "POST /chat/search": "Semantic search",
                 "POST /chat/feedback": "Submit feedback"
             }
         },
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "metrics": "/metrics",
+        "readiness": "/health/ready"
     }
 
 
@@ -11,7 +11,42 @@ class DocumentUploadResponse(BaseModel):
     document_id: Optional[str] = None
     filename: Optional[str] = None
     file_size: Optional[int] = None
+    sha256: Optional[str] = None
     chunks_count: Optional[int] = None
+    duplicate: bool = False
+    job_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchUploadResponse(BaseModel):
+    success: bool
+    message: str
+    results: List[DocumentUploadResponse] = []
+    total_files: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    total_chunks: int = 0
+    error: Optional[str] = None
+
+
+class JobStatusResponse(BaseModel):
+    success: bool
+    job_id: str
+    status: str
+    filename: Optional[str] = None
+    stages: Dict[str, Dict[str, Any]] = {}
+    document_id: Optional[str] = None
+    chunks_count: Optional[int] = None
+    duplicate: bool = False
+    created_at: str
+    updated_at: str
+    error: Optional[str] = None
+
+
+class JobListResponse(BaseModel):
+    success: bool
+    jobs: List[JobStatusResponse] = []
+    total_count: int = 0
     error: Optional[str] = None
 
 
@@ -26,6 +61,7 @@ class ChatResponse(BaseModel):
     question: str
     sources: List[Dict[str, Any]] = []
     timestamp: str
+    cached: bool = False
     error: Optional[str] = None
 
 
@@ -36,12 +72,16 @@ class DocumentInfo(BaseModel):
     file_size: int
     upload_time: str
     chunks_count: Optional[int] = None
+    sha256: Optional[str] = None
+    status: str = "indexed"
+    error: Optional[str] = None
 
 
 class DocumentListResponse(BaseModel):
     success: bool
     documents: List[DocumentInfo] = []
     total_count: int = 0
+    next_cursor: Optional[str] = None
     error: Optional[str] = None
 
 
@@ -61,9 +101,12 @@ class SearchResponse(BaseModel):
 class StatsResponse(BaseModel):
     success: bool
     total_documents: int = 0
+    total_chunks: int = 0
+    total_bytes: int = 0
     document_types: Dict[str, int] = {}
+    chunk_types: Dict[str, int] = {}
     vector_db_size: int = 0
-    last_updated: str
+    last_updated: Optional[str] = None
     error: Optional[str] = None
 
 
@@ -89,6 +132,15 @@ class HealthResponse(BaseModel):
     openai_status: str
 
 
+class ReadinessResponse(BaseModel):
+    ready: bool
+    model_loaded: bool
+    index_loaded: bool
+    warmup_seconds: Optional[float] = None
+    timestamp: str
+    error: Optional[str] = None
+
+
 class ErrorResponse(BaseModel):
     success: bool = False
     error: str
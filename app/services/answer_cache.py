@@ -0,0 +1,110 @@
+""""""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+
+class CorpusVersion:
+
+    # Kept in a file rather than in memory so that writes made by one worker
+    # process invalidate the answer caches of every other worker too.
+    def __init__(self, path: str = "./data/corpus_version"):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def current(self) -> int:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                return int(file.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump(self) -> int:
+        with self._lock:
+            version = self.current() + 1
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(str(version))
+            os.replace(tmp_path, self.path)
+            return version
+
+
+class SemanticAnswerCache:
+
+    def __init__(self, max_entries: Optional[int] = None, threshold: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")
+        )
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def filter_key(document_filter: Optional[Dict[str, Any]], k: Optional[int]) -> str:
+        return json.dumps({"filter": document_filter, "k": k}, sort_keys=True)
+
+    def _drop_stale(self, version: int):
+        stale = [entry_id for entry_id, entry in self._entries.items() if entry["version"] != version]
+        for entry_id in stale:
+            del self._entries[entry_id]
+        self._stats["invalidations"] += len(stale)
+
+    def lookup(self, vector: List[float], filter_key: str, version: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._drop_stale(version)
+            candidates = [
+                (entry_id, entry) for entry_id, entry in self._entries.items()
+                if entry["filter_key"] == filter_key
+            ]
+            if not candidates:
+                self._stats["misses"] += 1
+                return None
+
+            query = np.asarray(vector, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1.0)
+            similarities = np.stack([entry["vector"] for _, entry in candidates]) @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+
+            entry_id, entry = candidates[best]
+            self._entries.move_to_end(entry_id)
+            self._stats["hits"] += 1
+            return {**entry["result"], "cache_similarity": round(float(similarities[best]), 4)}
+
+    def store(self, vector: List[float], filter_key: str, version: int, result: Dict[str, Any]):
+        normalized = np.asarray(vector, dtype=np.float32)
+        normalized = normalized / (np.linalg.norm(normalized) or 1.0)
+        with self._lock:
+            self._drop_stale(version)
+            self._entries[self._next_id] = {
+                "vector": normalized,
+                "filter_key": filter_key,
+                "version": version,
+                "result": result
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "threshold": self.threshold
+            }
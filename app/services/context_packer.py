@@ -0,0 +1,148 @@
+""""""
+
+import os
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+
+from .keyword_index import tokenize
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly 4 characters per token for Latin text; CJK is about one
+    # token per character, which tokenize() counts as unigrams.
+    cjk = sum(1 for token in tokenize(text) if len(token) == 1 and not token.isascii())
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+def overlap_length(previous: str, following: str, max_overlap: int) -> int:
+    # Longest suffix of `previous` that `following` starts with
+    for size in range(min(len(previous), len(following), max_overlap), 19, -1):
+        if previous.endswith(following[:size]):
+            return size
+    return 0
+
+
+class ContextPacker:
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        min_score_ratio: Optional[float] = None,
+        diversity: Optional[float] = None,
+        max_overlap: int = 400
+    ):
+        self.token_budget = token_budget or int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+        # Applied to vector relevance, relative to the most relevant candidate.
+        # Fused RRF scores only encode rank, so they are never cut on.
+        self.min_score_ratio = min_score_ratio if min_score_ratio is not None else float(
+            os.getenv("CONTEXT_MIN_SCORE_RATIO", "0.3")
+        )
+        self.diversity = diversity if diversity is not None else float(os.getenv("CONTEXT_DIVERSITY", "0.3"))
+        self.max_overlap = max_overlap
+
+    @staticmethod
+    def _position(doc: "Document") -> Tuple[Any, Any]:
+        return doc.metadata.get("document_id"), doc.metadata.get("chunk_index")
+
+    @staticmethod
+    def _similarity(a: set, b: set) -> float:
+        return len(a & b) / len(a | b) if a and b else 0.0
+
+    def _cost(self, doc: "Document", selected: Dict[Tuple[Any, Any], "Document"]) -> int:
+        # Text a selected neighbour already contributes is not paid for twice
+        document_id, chunk_index = self._position(doc)
+        text = doc.page_content
+        if isinstance(chunk_index, int):
+            previous = selected.get((document_id, chunk_index - 1))
+            if previous is not None:
+                text = text[overlap_length(previous.page_content, text, self.max_overlap):]
+            following = selected.get((document_id, chunk_index + 1))
+            if following is not None:
+                size = overlap_length(text, following.page_content, self.max_overlap)
+                text = text[:len(text) - size]
+        return estimate_tokens(text)
+
+    def _merge(self, chosen: List[Tuple["Document", float]]) -> List[Dict[str, Any]]:
+        def reading_order(item: Tuple["Document", float]) -> Tuple[str, int]:
+            document_id, chunk_index = self._position(item[0])
+            return str(document_id), chunk_index if isinstance(chunk_index, int) else -1
+
+        passages: List[Dict[str, Any]] = []
+        for doc, score in sorted(chosen, key=reading_order):
+            document_id, chunk_index = self._position(doc)
+            last = passages[-1] if passages else None
+            if (
+                last is not None
+                and isinstance(chunk_index, int)
+                and last["document_id"] == document_id
+                and last["chunk_indexes"][-1] == chunk_index - 1
+            ):
+                text = doc.page_content
+                last["text"] += text[overlap_length(last["text"], text, self.max_overlap):]
+                last["chunk_indexes"].append(chunk_index)
+                last["score"] = max(last["score"], score)
+                continue
+            passages.append({
+                "document_id": document_id,
+                "chunk_indexes": [chunk_index],
+                "text": doc.page_content,
+                "score": score
+            })
+        passages.sort(key=lambda passage: passage["score"], reverse=True)
+        return passages
+
+    def pack(
+        self,
+        docs_and_scores: List[Tuple["Document", float]],
+        relevance: Optional[List[Optional[float]]] = None
+    ) -> Dict[str, Any]:
+        # `relevance` is the vector relevance of each candidate when the scores
+        # are something else (e.g. RRF); without it the scores are relevance.
+        # Keyword-only hits (None) matched the query terms and are always kept.
+        if not docs_and_scores:
+            return {"passages": [], "selected": [], "tokens": 0, "dropped": 0}
+
+        if relevance is None:
+            relevance = [score for _, score in docs_and_scores]
+        top_relevance = max((value for value in relevance if value is not None), default=0.0)
+        candidates = [
+            (doc, score) for (doc, score), value in zip(docs_and_scores, relevance)
+            if value is None or top_relevance <= 0 or value >= top_relevance * self.min_score_ratio
+        ]
+        top_score = max(score for _, score in docs_and_scores)
+        terms = [set(tokenize(doc.page_content)) for doc, _ in candidates]
+
+        # Greedy MMR: relevance minus similarity to what is already chosen,
+        # until the token budget is spent.
+        selected: Dict[Tuple[Any, Any], "Document"] = {}
+        chosen: List[Tuple["Document", float]] = []
+        chosen_terms: List[set] = []
+        remaining = list(range(len(candidates)))
+        tokens = 0
+        while remaining:
+            def mmr(i: int) -> float:
+                relevance = candidates[i][1] / top_score if top_score > 0 else 0.0
+                redundancy = max((self._similarity(terms[i], other) for other in chosen_terms), default=0.0)
+                return (1 - self.diversity) * relevance - self.diversity * redundancy
+
+            best = max(remaining, key=mmr)
+            remaining.remove(best)
+            doc, score = candidates[best]
+            cost = self._cost(doc, selected)
+            if tokens + cost > self.token_budget:
+                # Always send at least one chunk; otherwise skip and try smaller ones
+                if chosen:
+                    continue
+            selected[self._position(doc)] = doc
+            chosen.append((doc, score))
+            chosen_terms.append(terms[best])
+            tokens += cost
+
+        return {
+            "passages": self._merge(chosen),
+            "selected": sorted(chosen, key=lambda item: item[1], reverse=True),
+            "tokens": tokens,
+            "dropped": len(docs_and_scores) - len(chosen)
+        }
@@ -0,0 +1,111 @@
+""""""
+
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+
+
+class CorpusStats:
+
+    # Counters are kept in SQLite so increments from several worker
+    # processes (and the offline indexer) are applied atomically.
+    def __init__(self, path: str = "./data/corpus_stats.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                document_id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                file_size INTEGER NOT NULL,
+                chunks INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS type_totals (
+                type TEXT PRIMARY KEY,
+                documents INTEGER NOT NULL,
+                chunks INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS totals (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            INSERT OR IGNORE INTO totals VALUES ('documents', 0), ('chunks', 0), ('bytes', 0);
+            """
+        )
+        self._db.commit()
+
+    def _touch(self):
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_updated', ?)", (datetime.now().isoformat(),)
+        )
+
+    def _apply(self, doc_type: str, documents: int, chunks: int, size: int):
+        self._db.execute(
+            "INSERT INTO type_totals (type, documents, chunks) VALUES (?, ?, ?) "
+            "ON CONFLICT(type) DO UPDATE SET documents = documents + excluded.documents, chunks = chunks + excluded.chunks",
+            (doc_type, documents, chunks)
+        )
+        self._db.execute("DELETE FROM type_totals WHERE documents <= 0")
+        self._db.executemany(
+            "UPDATE totals SET value = value + ? WHERE key = ?",
+            [(documents, "documents"), (chunks, "chunks"), (size, "bytes")]
+        )
+
+    def record_documents(self, documents: List[Dict[str, Any]]):
+        # Each entry: document_id, type, file_size, chunks. A document that is
+        # already counted (e.g. written in several batches) is not counted twice.
+        with self._lock:
+            for document in documents:
+                inserted = self._db.execute(
+                    "INSERT OR IGNORE INTO documents (document_id, type, file_size, chunks) VALUES (?, ?, ?, ?)",
+                    (document["document_id"], document["type"], document["file_size"], document["chunks"])
+                ).rowcount
+                if inserted:
+                    self._apply(document["type"], 1, document["chunks"], document["file_size"])
+            self._touch()
+            self._db.commit()
+
+    def remove_document(self, document_id: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT type, file_size, chunks FROM documents WHERE document_id = ?", (document_id,)
+            ).fetchone()
+            if row is None:
+                return
+            doc_type, file_size, chunks = row
+            self._db.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+            self._apply(doc_type, -1, -chunks, -file_size)
+            self._touch()
+            self._db.commit()
+
+    def reset(self, documents: Optional[List[Dict[str, Any]]] = None):
+        with self._lock:
+            self._db.execute("DELETE FROM documents")
+            self._db.execute("DELETE FROM type_totals")
+            self._db.execute("UPDATE totals SET value = 0")
+            self._db.commit()
+        if documents:
+            self.record_documents(documents)
+        else:
+            with self._lock:
+                self._touch()
+                self._db.commit()
+
+    def get(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = dict(self._db.execute("SELECT key, value FROM totals").fetchall())
+            types = self._db.execute("SELECT type, documents, chunks FROM type_totals ORDER BY type").fetchall()
+            last_updated = self._db.execute("SELECT value FROM meta WHERE key = 'last_updated'").fetchone()
+        return {
+            "total_documents": totals["documents"],
+            "total_chunks": totals["chunks"],
+            "total_bytes": totals["bytes"],
+            "document_types": {doc_type: documents for doc_type, documents, _ in types},
+            "chunk_types": {doc_type: chunks for doc_type, _, chunks in types},
+            "last_updated": last_updated[0] if last_updated else None
+        }
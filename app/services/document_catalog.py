@@ -0,0 +1,194 @@
+""""""
+
+import os
+import json
+import base64
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+
+from sqlalchemy import (
+    create_engine, event, MetaData, Table, Column, Index, String, Integer, Text, select, delete, func, tuple_
+)
+from sqlalchemy.dialects.sqlite import insert
+
+STATUSES = ("queued", "indexing", "indexed", "failed")
+
+metadata = MetaData()
+
+documents_table = Table(
+    "documents",
+    metadata,
+    Column("document_id", String, primary_key=True),
+    Column("filename", String, nullable=False),
+    Column("type", String, nullable=False),
+    Column("file_size", Integer, nullable=False, default=0),
+    Column("sha256", String),
+    Column("chunks_count", Integer, nullable=False, default=0),
+    Column("upload_time", String, nullable=False),
+    Column("status", String, nullable=False),
+    Column("error", Text),
+    Column("file_path", String),
+    Column("updated_at", String, nullable=False),
+    # Every sort key ends in document_id so keyset pagination has a total order
+    Index("documents_upload_time", "upload_time", "document_id"),
+    Index("documents_filename", "filename", "document_id"),
+    Index("documents_file_size", "file_size", "document_id"),
+    Index("documents_status", "status", "upload_time", "document_id"),
+    Index("documents_type", "type", "upload_time", "document_id"),
+    Index("documents_sha256", "sha256"),
+)
+
+SORT_COLUMNS = {
+    "upload_time": documents_table.c.upload_time,
+    "filename": documents_table.c.filename,
+    "file_size": documents_table.c.file_size,
+}
+
+DOCUMENT_FIELDS = ("filename", "type", "file_size", "sha256", "chunks_count", "upload_time", "status", "error", "file_path")
+
+
+class DocumentCatalog:
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url or os.getenv("CATALOG_DATABASE_URL", "sqlite:///./data/catalog.db")
+        if self.url.startswith("sqlite:///"):
+            directory = os.path.dirname(self.url[len("sqlite:///"):])
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+        self.engine = create_engine(self.url, connect_args={"check_same_thread": False})
+
+        @event.listens_for(self.engine, "connect")
+        def _sqlite_pragmas(connection, _):
+            cursor = connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        metadata.create_all(self.engine)
+
+    @staticmethod
+    def _row(fields: Dict[str, Any]) -> Dict[str, Any]:
+        row = {key: fields[key] for key in DOCUMENT_FIELDS if key in fields}
+        row["document_id"] = fields["document_id"]
+        row["updated_at"] = datetime.now().isoformat()
+        return row
+
+    def upsert(self, document_id: str, **fields: Any):
+        self.upsert_many([{**fields, "document_id": document_id}])
+
+    def upsert_many(self, documents: List[Dict[str, Any]]):
+        if not documents:
+            return
+        with self.engine.begin() as connection:
+            for document in documents:
+                row = self._row(document)
+                statement = insert(documents_table).values(**row)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[documents_table.c.document_id],
+                    set_={key: statement.excluded[key] for key in row if key != "document_id"}
+                )
+                connection.execute(statement)
+
+    def set_status(self, document_id: str, status: str, error: Optional[str] = None, **fields: Any):
+        with self.engine.begin() as connection:
+            connection.execute(
+                documents_table.update()
+                .where(documents_table.c.document_id == document_id)
+                .values(status=status, error=error, updated_at=datetime.now().isoformat(), **fields)
+            )
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as connection:
+            row = connection.execute(
+                select(documents_table).where(documents_table.c.document_id == document_id)
+            ).mappings().first()
+        return dict(row) if row else None
+
+    def get_many(self, document_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not document_ids:
+            return {}
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(documents_table).where(documents_table.c.document_id.in_(set(document_ids)))
+            ).mappings().all()
+        return {row["document_id"]: dict(row) for row in rows}
+
+    def remove(self, document_id: str, status: Optional[str] = None) -> bool:
+        conditions = [documents_table.c.document_id == document_id]
+        if status is not None:
+            conditions.append(documents_table.c.status == status)
+        with self.engine.begin() as connection:
+            result = connection.execute(delete(documents_table).where(*conditions))
+        return result.rowcount > 0
+
+    def count(self) -> int:
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.count()).select_from(documents_table)).scalar_one()
+
+    def clear(self):
+        with self.engine.begin() as connection:
+            connection.execute(delete(documents_table))
+
+    @staticmethod
+    def encode_cursor(sort_value: Any, document_id: str) -> str:
+        raw = json.dumps([sort_value, document_id]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str, sort: str = "upload_time") -> List[Any]:
+        try:
+            value = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError("Invalid cursor")
+        # A cursor from another sort order (or a hand-made one) must not
+        # reach the query with values of the wrong type
+        sort_type = SORT_COLUMNS[sort].type.python_type
+        last_value, last_id = value
+        if type(last_value) is not sort_type or not isinstance(last_id, str):
+            raise ValueError("Invalid cursor")
+        return value
+
+    def list(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = "upload_time",
+        descending: bool = True,
+        status: Optional[str] = None,
+        doc_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort field: {sort}")
+        sort_column = SORT_COLUMNS[sort]
+        key = tuple_(sort_column, documents_table.c.document_id)
+
+        conditions = []
+        if status:
+            conditions.append(documents_table.c.status == status)
+        if doc_type:
+            conditions.append(documents_table.c.type == doc_type)
+
+        # Keyset pagination: seek past the last row of the previous page
+        # instead of OFFSET, so deep pages cost the same as the first one.
+        query = select(documents_table).where(*conditions)
+        if cursor:
+            last_value, last_id = self.decode_cursor(cursor, sort)
+            query = query.where(key < tuple_(last_value, last_id) if descending else key > tuple_(last_value, last_id))
+        if descending:
+            query = query.order_by(sort_column.desc(), documents_table.c.document_id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), documents_table.c.document_id.asc())
+
+        with self.engine.connect() as connection:
+            rows = [dict(row) for row in connection.execute(query.limit(limit + 1)).mappings()]
+            total = connection.execute(
+                select(func.count()).select_from(documents_table).where(*conditions)
+            ).scalar_one()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor(rows[-1][sort], rows[-1]["document_id"])
+        return {"documents": rows, "next_cursor": next_cursor, "total_count": total}
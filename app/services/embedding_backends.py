@@ -0,0 +1,147 @@
+""""""
+
+import os
+import math
+import platform
+import argparse
+from typing import List, Dict, Any, Optional, Tuple
+
+DEFAULT_PARITY_TEXTS = [
+    "What is the main content of the document?",
+    "Summarize the key points.",
+    "Error code E1042 appears when the pump pressure sensor is disconnected.",
+    "The quarterly revenue grew by 12% compared to the previous year.",
+    "請總結這份文件的重點。",
+    "Installation requires Python 3.8+ and a Groq API key.",
+    "Part number A-2231-B replaces the discontinued A-2231-A bracket.",
+    "Retrieval-augmented generation combines a retriever with a language model.",
+]
+
+
+class OnnxEmbeddings:
+
+    def __init__(
+        self,
+        model_name: str,
+        normalize: bool = True,
+        quantize: bool = True,
+        quant_config: Optional[str] = None,
+        export_dir: Optional[str] = None,
+        batch_size: int = 64
+    ):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError("EMBEDDING_BACKEND=onnx needs sentence-transformers>=3.2 and optimum[onnxruntime]") from e
+
+        self.model_name = model_name
+        self.normalize = normalize
+        self.batch_size = batch_size
+        self.quant_config = quant_config or (
+            "arm64" if platform.machine().lower() in ("arm64", "aarch64") else "avx2"
+        )
+        self.export_dir = export_dir or os.path.join(
+            os.getenv("EMBEDDING_ONNX_DIR", "./cache/onnx"), model_name.replace("/", "__")
+        )
+
+        if not quantize:
+            self.backend_id = "onnx-fp32"
+            self.model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+            return
+
+        # Quantize once and reuse the exported file on later starts
+        self.backend_id = f"onnx-qint8-{self.quant_config}"
+        file_name = f"onnx/model_qint8_{self.quant_config}.onnx"
+        if not os.path.exists(os.path.join(self.export_dir, file_name)):
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+            model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+            model.save(self.export_dir)
+            export_dynamic_quantized_onnx_model(model, self.quant_config, self.export_dir)
+        self.model = SentenceTransformer(
+            self.export_dir, device="cpu", backend="onnx", model_kwargs={"file_name": file_name}
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=self.normalize,
+            convert_to_numpy=True
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def build_base_embeddings(model_name: str, normalize: bool = True, backend: Optional[str] = None) -> Tuple[Any, str]:
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+    if backend == "onnx":
+        embeddings = OnnxEmbeddings(
+            model_name,
+            normalize=normalize,
+            quantize=os.getenv("EMBEDDING_ONNX_QUANTIZE", "int8").lower() != "none",
+            quant_config=os.getenv("EMBEDDING_ONNX_QUANT_CONFIG") or None
+        )
+        return embeddings, embeddings.backend_id
+    if backend != "torch":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    embeddings = HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': normalize}
+    )
+    return embeddings, "torch"
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def check_parity(reference, candidate, texts: Optional[List[str]] = None, threshold: float = 0.99) -> Dict[str, Any]:
+    texts = texts or DEFAULT_PARITY_TEXTS
+    expected = reference.embed_documents(texts)
+    actual = candidate.embed_documents(texts)
+    cosines = sorted(_cosine(a, b) for a, b in zip(expected, actual))
+    return {
+        "texts": len(texts),
+        "mean_cosine": round(sum(cosines) / len(cosines), 6),
+        "min_cosine": round(cosines[0], 6),
+        "p5_cosine": round(cosines[int(len(cosines) * 0.05)], 6),
+        "below_threshold": sum(1 for value in cosines if value < threshold),
+        "threshold": threshold,
+        "passed": cosines[0] >= threshold
+    }
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.embedding_backends",
+        description="Compare the ONNX embedding backend against the PyTorch model"
+    )
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--texts-file", help="File with one sample text per line")
+    parser.add_argument("--no-quantize", action="store_true", help="Compare the fp32 ONNX export instead of int8")
+    parser.add_argument("--threshold", type=float, default=0.99, help="Minimum acceptable cosine per text")
+    args = parser.parse_args(argv)
+
+    texts = None
+    if args.texts_file:
+        with open(args.texts_file, 'r', encoding='utf-8') as file:
+            texts = [line.strip() for line in file if line.strip()]
+
+    reference, _ = build_base_embeddings(args.model, backend="torch")
+    candidate = OnnxEmbeddings(args.model, quantize=not args.no_quantize)
+    report = check_parity(reference, candidate, texts=texts, threshold=args.threshold)
+    print(f"backend: {candidate.backend_id}")
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
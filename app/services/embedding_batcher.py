@@ -0,0 +1,116 @@
+""""""
+
+import os
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class EmbeddingBatcher:
+
+    SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+    def __init__(self, embeddings, max_batch_size: Optional[int] = None, max_wait_ms: Optional[float] = None):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size or int(os.getenv("QUERY_BATCH_SIZE", "32"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv("QUERY_BATCH_WAIT_MS", "5"))) / 1000
+        self._queue: "queue.Queue[Tuple[str, Future, float]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._batches = 0
+        self._queries = 0
+        self._size_histogram = {bucket: 0 for bucket in self.SIZE_BUCKETS}
+        self._wait_ms: "deque[float]" = deque(maxlen=2000)
+        self._encode_ms: "deque[float]" = deque(maxlen=2000)
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="query-embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def embed_query(self, text: str) -> List[float]:
+        self._ensure_thread()
+        future: Future = Future()
+        self._queue.put((text, future, time.monotonic()))
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Ingestion already sends large batches, so it bypasses the queue
+        return self.embeddings.embed_documents(texts)
+
+    def _collect(self) -> List[Tuple[str, Future, float]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            texts = [text for text, _, _ in batch]
+            try:
+                embed_queries = getattr(self.embeddings, "embed_queries", None)
+                if embed_queries is not None:
+                    vectors = embed_queries(texts)
+                else:
+                    vectors = self.embeddings.embed_documents(texts)
+                for (_, future, _), vector in zip(batch, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            self._record(batch, started)
+
+    def _record(self, batch: List[Tuple[str, Future, float]], started: float):
+        finished = time.monotonic()
+        with self._metrics_lock:
+            self._batches += 1
+            self._queries += len(batch)
+            bucket = next((b for b in self.SIZE_BUCKETS if len(batch) <= b), self.SIZE_BUCKETS[-1])
+            self._size_histogram[bucket] += 1
+            self._wait_ms.extend((started - enqueued) * 1000 for _, _, enqueued in batch)
+            self._encode_ms.append((finished - started) * 1000)
+
+    @staticmethod
+    def _percentile(values: List[float], pct: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 3)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            waits = list(self._wait_ms)
+            encodes = list(self._encode_ms)
+            return {
+                "batches": self._batches,
+                "queries": self._queries,
+                "avg_batch_size": round(self._queries / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": {f"<={bucket}": count for bucket, count in self._size_histogram.items()},
+                "queue_wait_ms": {
+                    "p50": self._percentile(waits, 0.5),
+                    "p95": self._percentile(waits, 0.95),
+                    "max": round(max(waits), 3) if waits else 0.0
+                },
+                "encode_ms": {
+                    "p50": self._percentile(encodes, 0.5),
+                    "p95": self._percentile(encodes, 0.95)
+                },
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000
+            }
@@ -0,0 +1,138 @@
+""""""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+
+class CachedEmbeddings:
+
+    SQL_BATCH = 500
+
+    def __init__(
+        self,
+        base,
+        model_name: str,
+        normalize: bool,
+        cache_path: Optional[str] = None,
+        memory_size: Optional[int] = None
+    ):
+        self.base = base
+        self.model_name = model_name
+        self.normalize = normalize
+        self.cache_path = cache_path or os.getenv("EMBEDDING_CACHE_PATH", "./cache/embeddings.sqlite3")
+        self.memory_size = memory_size if memory_size is not None else int(
+            os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "20000")
+        )
+        # Vectors are held as float32 arrays (4 bytes per value instead of a
+        # list of Python floats) and only turned into lists when returned.
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        directory = os.path.dirname(self.cache_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._db = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._db.commit()
+
+    def _key(self, kind: str, text: str) -> str:
+        # The model and normalisation are part of the key, so switching
+        # either never serves vectors from the old configuration.
+        raw = f"{self.model_name}\0{int(self.normalize)}\0{kind}\0{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: array):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[str], persistent: bool) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector.tolist()
+            self._stats["memory_hits"] += len(found)
+
+            missing = [key for key in dict.fromkeys(keys) if key not in found] if persistent else []
+            for start in range(0, len(missing), self.SQL_BATCH):
+                batch = missing[start:start + self.SQL_BATCH]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+                    self._remember(key, vector)
+                    self._stats["disk_hits"] += 1
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]], persistent: bool):
+        packed = {key: array("f", vector) for key, vector in vectors.items()}
+        with self._lock:
+            for key, vector in packed.items():
+                self._remember(key, vector)
+            if persistent:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in packed.items()]
+                )
+                self._db.commit()
+            self._stats["misses"] += len(vectors)
+
+    def _embed(self, kind: str, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(kind, text) for text in texts]
+        # Chunk texts are bounded by the corpus; query texts are not, so
+        # they stay in the memory LRU and never grow the disk tier.
+        persistent = kind != "query"
+        found = self._lookup(keys, persistent)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            if kind == "query" and len(missing) == 1:
+                computed = [self.base.embed_query(next(iter(missing.values())))]
+            else:
+                # sentence-transformers encodes queries and documents the
+                # same way, so a batch of queries is one encode call.
+                computed = self.base.embed_documents(list(missing.values()))
+            new_vectors = {key: list(vector) for key, vector in zip(missing, computed)}
+            self._store(new_vectors, persistent)
+            found.update(new_vectors)
+
+        return [found[key] for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed("document", texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed("query", [text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._embed("query", texts)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = sum(self._stats.values())
+            return {
+                **self._stats,
+                "memory_entries": len(self._memory),
+                "hit_rate": round((lookups - self._stats["misses"]) / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,50 @@
+""""""
+
+import os
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+# Each workload gets its own pool so a burst of one kind (e.g. OCR-heavy
+# uploads) cannot starve another (e.g. search) of worker threads.
+WORKLOAD_LIMITS = {
+    "extract": ("EXTRACT_CONCURRENCY", 2),
+    "embed": ("EMBED_CONCURRENCY", 2),
+    "search": ("SEARCH_CONCURRENCY", 8),
+}
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(workload: str) -> ThreadPoolExecutor:
+    with _executors_lock:
+        executor = _executors.get(workload)
+        if executor is None:
+            env_name, default = WORKLOAD_LIMITS[workload]
+            executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv(env_name, str(default))),
+                thread_name_prefix=f"{workload}-worker"
+            )
+            _executors[workload] = executor
+        return executor
+
+
+async def run_blocking(workload: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(workload), functools.partial(fn, *args, **kwargs))
+
+
+def run_in_workload(workload: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return get_executor(workload).submit(fn, *args, **kwargs).result()
+
+
+def shutdown_executors():
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False)
+        _executors.clear()
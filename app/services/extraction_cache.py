@@ -0,0 +1,80 @@
+""""""
+
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+
+class ExtractionCache:
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv("EXTRACTION_CACHE_DIR", "./cache/extraction")
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(1024 * 1024 * 1024))
+        )
+        self._lock = threading.Lock()
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    def _scan(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _path(self, file_hash: str, extractor: str, version: str) -> str:
+        key = hashlib.sha256(f"{file_hash}:{extractor}:{version}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, file_hash: str, extractor: str, version: str) -> Optional[Dict[str, Any]]:
+        path = self._path(file_hash, extractor, version)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+            # mtime doubles as the LRU clock
+            os.utime(path, None)
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"extraction cache read error: {str(e)}")
+            return None
+
+    def put(self, file_hash: str, extractor: str, version: str, result: Dict[str, Any]):
+        path = self._path(file_hash, extractor, version)
+        payload = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        if self.max_bytes and len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as file:
+                file.write(payload)
+            os.replace(tmp_path, path)
+            self._total_bytes += len(payload) - previous
+            if self.max_bytes and self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop least recently used entries until 90% of the cap is free again.
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        self._total_bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
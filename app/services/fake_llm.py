@@ -0,0 +1,36 @@
+""""""
+
+import os
+import asyncio
+from typing import List, Dict, AsyncIterator, Optional
+
+
+class FakeLLMProvider:
+
+    # Stands in for a real model (LLM_PROVIDER=fake) so the answer and
+    # streaming paths can be exercised without an API key or network access.
+    def __init__(self, response: Optional[str] = None, token_delay_ms: Optional[float] = None):
+        self.response = response or os.getenv(
+            "FAKE_LLM_RESPONSE",
+            "This is a fake answer based on {sources} retrieved passages for: {question}"
+        )
+        self.token_delay = (
+            token_delay_ms if token_delay_ms is not None else float(os.getenv("FAKE_LLM_TOKEN_DELAY_MS", "20"))
+        ) / 1000
+
+    def render(self, messages: List[Dict[str, str]]) -> str:
+        system, question = messages[0]["content"], messages[-1]["content"]
+        sources = len([part for part in system.split("----------------\n", 1)[-1].split("\n\n") if part.strip()])
+        return self.response.format(question=question, sources=sources)
+
+    def tokens(self, messages: List[Dict[str, str]]) -> List[str]:
+        words = self.render(messages).split(" ")
+        return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+    async def complete(self, http, messages: List[Dict[str, str]]) -> str:
+        return self.render(messages)
+
+    async def stream(self, http, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        for token in self.tokens(messages):
+            await asyncio.sleep(self.token_delay)
+            yield token
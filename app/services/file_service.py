@@ -1,14 +1,21 @@
 """"""
 
 import os
-from typing import Dict, Any, Optional
+import uuid
+import hashlib
+import zipfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Callable
 from fastapi import UploadFile
 import PyPDF2
 import docx
 import markdown
 from datetime import datetime
-import os
-from typing import List
+from typing import List, Tuple
+
+from .extraction_cache import ExtractionCache
 
 try:
     import pytesseract  # OCR
@@ -16,9 +23,66 @@ except Exception:
     pytesseract = None  # type: ignore
 
 try:
-    from pdf2image import convert_from_path  # PDF -> images
+    from pdf2image import convert_from_path, pdfinfo_from_path  # PDF -> images
 except Exception:
     convert_from_path = None  # type: ignore
+    pdfinfo_from_path = None  # type: ignore
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _page_has_text_layer(page) -> bool:
+    resources = page.get("/Resources")
+    if resources is None:
+        return False
+    resources = resources.get_object()
+    if "/Font" in resources:
+        return True
+    xobjects = resources.get("/XObject")
+    if xobjects is not None:
+        for xobject in xobjects.get_object().values():
+            if xobject.get_object().get("/Subtype") == "/Form":
+                return True
+    return False
+
+
+def _extract_pdf_page_range(
+    file_path: str, start: int, end: int, min_chars: int = 0
+) -> List[Tuple[int, str, bool]]:
+    # Runs in a worker process: each worker opens its own reader because
+    # PyPDF2 page objects cannot be shipped across processes. Each result
+    # carries a flag telling the caller whether the page still needs OCR.
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        results: List[Tuple[int, str, bool]] = []
+        for page_num in range(start, end):
+            page = pdf_reader.pages[page_num]
+            text = ""
+            if _page_has_text_layer(page):
+                text = page.extract_text() or ""
+            results.append((page_num + 1, text, len(text.strip()) < max(min_chars, 1)))
+        return results
+
+
+def _ocr_pdf_page_range(
+    file_path: str, first_page: int, last_page: int, dpi: int, poppler_path: str, tesseract_cmd: str
+) -> List[Tuple[int, str]]:
+    # Renders only this window of pages, so a worker never holds more than
+    # `last_page - first_page + 1` page bitmaps at once.
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    images = convert_from_path(
+        file_path,
+        dpi=dpi,
+        first_page=first_page,
+        last_page=last_page,
+        poppler_path=poppler_path,
+        thread_count=1
+    )
+    results: List[Tuple[int, str]] = []
+    for offset, img in enumerate(images):
+        results.append((first_page + offset, pytesseract.image_to_string(img) or ""))
+        img.close()
+    return results
 
 
 class FileService:
@@ -31,8 +95,64 @@ class FileService:
         'application/msword': '.doc'
     }
     
-    def __init__(self, upload_dir: str = "./data"):
+    ARCHIVE_TYPES = {
+        'application/zip',
+        'application/x-zip-compressed'
+    }
+    
+    EXTENSION_TYPES = {
+        '.txt': 'text/plain',
+        '.md': 'text/markdown',
+        '.markdown': 'text/markdown',
+        '.pdf': 'application/pdf',
+        '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        '.doc': 'application/msword'
+    }
+    
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    FILE_TOO_LARGE = "File too large"
+    ARCHIVE_TOO_LARGE = "Archive too large"
+    
+    # Bump an extractor's version whenever its output changes so cached
+    # extractions from the old code are no longer served.
+    EXTRACTOR_VERSIONS = {
+        "txt": "1",
+        "markdown": "1",
+        "pdf": "2",
+        "docx": "1"
+    }
+    
+    _pdf_pool: Optional[ProcessPoolExecutor] = None
+    _ocr_pool: Optional[ProcessPoolExecutor] = None
+    _pdf_pool_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        upload_dir: str = "./data",
+        max_upload_size: Optional[int] = None,
+        pdf_workers: Optional[int] = None,
+        ocr_workers: Optional[int] = None,
+        extraction_cache: Optional[ExtractionCache] = None
+    ):
         self.upload_dir = upload_dir
+        self.max_upload_size = max_upload_size if max_upload_size is not None else int(
+            os.getenv("MAX_UPLOAD_SIZE", str(500 * 1024 * 1024))
+        )
+        # Archives are bounded as a whole too, so a small zip cannot expand
+        # into more files or bytes than this.
+        self.archive_max_members = int(os.getenv("ARCHIVE_MAX_MEMBERS", "1000"))
+        self.archive_max_total_size = int(os.getenv("ARCHIVE_MAX_TOTAL_SIZE", str(2 * 1024 * 1024 * 1024)))
+        self.pdf_workers = pdf_workers if pdf_workers is not None else int(
+            os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1))
+        )
+        self.pdf_parallel_min_pages = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+        self.ocr_workers = ocr_workers if ocr_workers is not None else int(
+            os.getenv("OCR_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+        )
+        self.ocr_dpi = int(os.getenv("OCR_DPI", "300"))
+        self.ocr_window_pages = max(1, int(os.getenv("OCR_WINDOW_PAGES", "2")))
+        self.ocr_min_page_chars = int(os.getenv("OCR_MIN_PAGE_CHARS", "20"))
+        self.extraction_cache = extraction_cache
         self._ensure_upload_dir()
         # Configure OCR tool paths if available
         try:
@@ -53,56 +173,254 @@ class FileService:
     def get_file_extension(self, file: UploadFile) -> str:
         return self.SUPPORTED_TYPES.get(file.content_type, '')
     
-    async def save_file(self, file: UploadFile) -> Dict[str, Any]:
+    def is_archive(self, file: UploadFile) -> bool:
+        return file.content_type in self.ARCHIVE_TYPES or \
+            (file.filename or "").lower().endswith(".zip")
+    
+    def _new_upload_path(self, original_name: Optional[str]) -> Tuple[str, str]:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{os.path.basename(original_name or 'upload')}"
+        return os.path.join(self.upload_dir, filename), filename
+    
+    def _too_large_result(self) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "message": f"File exceeds max upload size of {self.max_upload_size} bytes",
+            "error": self.FILE_TOO_LARGE
+        }
+    
+    def _archive_too_large_result(self, message: str) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "files": [],
+            "message": message,
+            "error": self.ARCHIVE_TOO_LARGE
+        }
+    
+    async def save_file(self, file: UploadFile, allow_archive: bool = False) -> Dict[str, Any]:
+        file_path = None
         try:
-            if not self.is_supported_file(file):
+            if not (self.is_supported_file(file) or (allow_archive and self.is_archive(file))):
                 return {
                     "success": False,
                     "message": f"Unsupported file type: {file.content_type}",
                     "error": "Unsupported file type"
                 }
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_extension = self.get_file_extension(file)
-            filename = f"{timestamp}_{file.filename}"
-            file_path = os.path.join(self.upload_dir, filename)
+            declared_size = getattr(file, "size", None)
+            if self.max_upload_size and declared_size and declared_size > self.max_upload_size:
+                return self._too_large_result()
+            
+            file_path, filename = self._new_upload_path(file.filename)
+            
+            # Copy in fixed-size chunks so large uploads never sit in memory;
+            # size limit and digest are checked as the data streams in.
+            digest = hashlib.sha256()
+            file_size = 0
+            with open(file_path, "wb") as buffer:
+                while True:
+                    chunk = await file.read(self.UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    file_size += len(chunk)
+                    if self.max_upload_size and file_size > self.max_upload_size:
+                        break
+                    digest.update(chunk)
+                    buffer.write(chunk)
+            
+            if self.max_upload_size and file_size > self.max_upload_size:
+                os.remove(file_path)
+                return self._too_large_result()
             
+            return {
+                "success": True,
+                "message": "Saved",
+                "file_path": file_path,
+                "filename": filename,
+                "file_size": file_size,
+                "sha256": digest.hexdigest()
+            }
+            
+        except Exception as e:
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+            return {
+                "success": False,
+                "message": f"Save failed: {str(e)}",
+                "error": str(e)
+            }
+    
+    def _save_stream(self, source, original_name: str, max_size: Optional[int] = None) -> Dict[str, Any]:
+        file_path, filename = self._new_upload_path(original_name)
+        limit = max_size if max_size is not None else self.max_upload_size
+        try:
+            digest = hashlib.sha256()
+            file_size = 0
             with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
+                for chunk in iter(lambda: source.read(self.UPLOAD_CHUNK_SIZE), b""):
+                    file_size += len(chunk)
+                    if limit and file_size > limit:
+                        break
+                    digest.update(chunk)
+                    buffer.write(chunk)
+            
+            if limit and file_size > limit:
+                os.remove(file_path)
+                return self._too_large_result()
             
             return {
                 "success": True,
                 "message": "Saved",
                 "file_path": file_path,
                 "filename": filename,
-                "file_size": len(content)
+                "file_size": file_size,
+                "sha256": digest.hexdigest()
             }
             
         except Exception as e:
+            if os.path.exists(file_path):
+                os.remove(file_path)
             return {
                 "success": False,
                 "message": f"Save failed: {str(e)}",
                 "error": str(e)
             }
     
-    def extract_text_from_file(self, file_path: str, file_type: str) -> Dict[str, Any]:
+    def extract_archive(self, archive_path: str) -> Dict[str, Any]:
+        files: List[Dict[str, Any]] = []
         try:
-            if file_type == 'text/plain':
-                return self._extract_from_txt(file_path)
-            elif file_type == 'text/markdown':
-                return self._extract_from_markdown(file_path)
-            elif file_type == 'application/pdf':
-                return self._extract_from_pdf(file_path)
-            elif file_type in ['application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/msword']:
-                return self._extract_from_docx(file_path)
-            else:
+            with zipfile.ZipFile(archive_path) as archive:
+                members = [info for info in archive.infolist() if not info.is_dir()]
+                if self.archive_max_members and len(members) > self.archive_max_members:
+                    return self._archive_too_large_result(
+                        f"Archive has {len(members)} files, limit is {self.archive_max_members}"
+                    )
+                # Declared sizes reject obvious bombs up front; the bytes
+                # actually written are counted too, as headers can lie.
+                remaining = self.archive_max_total_size
+                declared = sum(info.file_size for info in members)
+                if remaining and declared > remaining:
+                    return self._archive_too_large_result(
+                        f"Archive expands to {declared} bytes, limit is {remaining}"
+                    )
+                
+                for info in members:
+                    # Only the basename is used, so member paths cannot escape upload_dir
+                    name = os.path.basename(info.filename)
+                    content_type = self.EXTENSION_TYPES.get(os.path.splitext(name)[1].lower())
+                    if not name or name.startswith(".") or content_type is None:
+                        files.append({
+                            "success": False,
+                            "original_filename": info.filename,
+                            "message": f"Unsupported file type: {info.filename}",
+                            "error": "Unsupported file type"
+                        })
+                        continue
+                    
+                    # Whichever is smaller limits this member: the per-file
+                    # cap or what is left of the archive's total budget
+                    budget_bound = bool(remaining) and (not self.max_upload_size or remaining < self.max_upload_size)
+                    max_size = remaining if budget_bound else self.max_upload_size
+                    with archive.open(info) as source:
+                        save_result = self._save_stream(source, name, max_size=max_size)
+                    if budget_bound and save_result.get("error") == self.FILE_TOO_LARGE:
+                        self._remove_saved(files)
+                        return self._archive_too_large_result(
+                            f"Archive expands to more than {self.archive_max_total_size} bytes"
+                        )
+                    if save_result["success"] and remaining:
+                        remaining -= save_result["file_size"]
+                    files.append({
+                        **save_result,
+                        "original_filename": info.filename,
+                        "content_type": content_type
+                    })
+            
+            return {
+                "success": True,
+                "files": files,
+                "message": f"Archive unpacked, files: {len(files)}"
+            }
+            
+        except Exception as e:
+            self._remove_saved(files)
+            return {
+                "success": False,
+                "files": [],
+                "message": f"Archive unpack failed: {str(e)}",
+                "error": str(e)
+            }
+        finally:
+            if os.path.exists(archive_path):
+                os.remove(archive_path)
+    
+    def _remove_saved(self, files: List[Dict[str, Any]]):
+        for saved in files:
+            if saved.get("success") and os.path.exists(saved["file_path"]):
+                os.remove(saved["file_path"])
+    
+    def compute_file_hash(self, file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(self.UPLOAD_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _get_extractor(self, file_type: str) -> Tuple[Optional[str], Optional[str]]:
+        if file_type == 'text/plain':
+            extractor = "txt"
+        elif file_type == 'text/markdown':
+            extractor = "markdown"
+        elif file_type == 'application/pdf':
+            extractor = "pdf"
+        elif file_type in ['application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/msword']:
+            extractor = "docx"
+        else:
+            return None, None
+        
+        version = self.EXTRACTOR_VERSIONS[extractor]
+        if extractor == "pdf":
+            # OCR settings change the extracted text, so they are part of the key
+            version = f"{version}:dpi={self.ocr_dpi}:min_chars={self.ocr_min_page_chars}"
+        return extractor, version
+    
+    def extract_text_from_file(
+        self,
+        file_path: str,
+        file_type: str,
+        progress: Optional[ProgressCallback] = None,
+        file_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        try:
+            extractor, version = self._get_extractor(file_type)
+            if extractor is None:
                 return {
                     "success": False,
                     "content": "",
                     "message": f"Unsupported file type: {file_type}",
                     "error": "Unsupported file type"
                 }
+            
+            if self.extraction_cache is not None:
+                file_hash = file_hash or self.compute_file_hash(file_path)
+                cached = self.extraction_cache.get(file_hash, extractor, version)
+                if cached is not None:
+                    return {**cached, "cached": True}
+            
+            if extractor == "txt":
+                result = self._extract_from_txt(file_path)
+            elif extractor == "markdown":
+                result = self._extract_from_markdown(file_path)
+            elif extractor == "pdf":
+                result = self._extract_from_pdf(file_path, progress=progress)
+            else:
+                result = self._extract_from_docx(file_path)
+            
+            # A result with pages OCR could not read is not cached, so the
+            # file is extracted again once OCR works.
+            if self.extraction_cache is not None and result["success"] and not result.get("ocr_failed_pages"):
+                self.extraction_cache.put(file_hash, extractor, version, result)
+            return result
                 
         except Exception as e:
             return {
@@ -161,26 +479,92 @@ class FileService:
                 "error": str(e)
             }
     
-    def _extract_from_pdf(self, file_path: str) -> Dict[str, Any]:
+    # The server process runs threads (the embedding batcher, torch, SQLite
+    # handles), so workers are spawned fresh instead of forked from it.
+    @classmethod
+    def _get_pdf_pool(cls, max_workers: int) -> ProcessPoolExecutor:
+        with cls._pdf_pool_lock:
+            if cls._pdf_pool is None:
+                cls._pdf_pool = ProcessPoolExecutor(
+                    max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return cls._pdf_pool
+    
+    @classmethod
+    def _get_ocr_pool(cls, max_workers: int) -> ProcessPoolExecutor:
+        with cls._pdf_pool_lock:
+            if cls._ocr_pool is None:
+                cls._ocr_pool = ProcessPoolExecutor(
+                    max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return cls._ocr_pool
+    
+    def _extract_pdf_pages(self, file_path: str, page_count: int) -> List[Tuple[int, str, bool]]:
+        if self.pdf_workers <= 1 or page_count < self.pdf_parallel_min_pages:
+            return _extract_pdf_page_range(file_path, 0, page_count, self.ocr_min_page_chars)
+        
+        # A few ranges per worker keeps the pool busy when page costs vary.
+        range_size = max(1, -(-page_count // (self.pdf_workers * 4)))
+        pool = self._get_pdf_pool(self.pdf_workers)
+        futures = [
+            pool.submit(
+                _extract_pdf_page_range,
+                file_path, start, min(start + range_size, page_count), self.ocr_min_page_chars
+            )
+            for start in range(0, page_count, range_size)
+        ]
+        pages: List[Tuple[int, str, bool]] = []
+        for future in futures:
+            pages.extend(future.result())
+        return pages
+    
+    def _extract_from_pdf(
+        self, file_path: str, progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
         try:
-            content = ""
             with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    content += page.extract_text() + "\n"
+                page_count = len(PyPDF2.PdfReader(file).pages)
+            
+            extracted = self._extract_pdf_pages(file_path, page_count)
+            page_texts = {page_num: text for page_num, text, _ in extracted}
+            
+            # Only pages without a usable text layer go through OCR; the two
+            # paths are merged back in page order.
+            ocr_pages = [page_num for page_num, _, needs_ocr in extracted if needs_ocr]
+            ocr_result = None
+            ocr_failed_pages: List[int] = []
+            if ocr_pages:
+                ocr_result = self._ocr_pdf(file_path, page_numbers=ocr_pages, progress=progress)
+                if ocr_result["success"]:
+                    for page in ocr_result["pages"]:
+                        page_texts[page["page"]] = page["content"]
+                ocr_failed_pages = ocr_result.get("failed_pages", [])
+            
+            pages = [
+                {"page": page_num, "content": page_texts[page_num]}
+                for page_num in sorted(page_texts)
+            ]
+            content = "\n".join(page["content"] for page in pages)
             
             if not content.strip():
-                ocr_result = self._ocr_pdf(file_path)
-                if ocr_result["success"] and ocr_result["content"].strip():
+                if ocr_result is not None:
                     return ocr_result
-                return ocr_result
+                return {
+                    "success": False,
+                    "content": "",
+                    "message": "No text content in PDF",
+                    "error": "No text content found"
+                }
             
+            message = f"PDF parsed, pages: {page_count}, OCR pages: {len(ocr_pages) - len(ocr_failed_pages)}"
+            if ocr_failed_pages:
+                message += f", OCR failed for {len(ocr_failed_pages)} pages: {ocr_result['error']}"
             return {
                 "success": True,
                 "content": content,
-                "message": f"PDF parsed, pages: {len(pdf_reader.pages)}"
+                "pages": pages,
+                "ocr_failed_pages": ocr_failed_pages,
+                "message": message
             }
             
         except Exception as e:
@@ -191,37 +575,115 @@ class FileService:
                 "error": str(e)
             }
 
-    def _ocr_pdf(self, file_path: str) -> Dict[str, Any]:
+    def _ocr_windows(self, page_numbers: List[int]) -> List[Tuple[int, int]]:
+        windows: List[Tuple[int, int]] = []
+        for page_num in sorted(page_numbers):
+            if windows and windows[-1][1] == page_num - 1 and \
+                    windows[-1][1] - windows[-1][0] + 1 < self.ocr_window_pages:
+                windows[-1] = (windows[-1][0], page_num)
+            else:
+                windows.append((page_num, page_num))
+        return windows
+    
+    def _ocr_pdf(
+        self,
+        file_path: str,
+        page_numbers: Optional[List[int]] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
         if pytesseract is None or convert_from_path is None:
             return {
                 "success": False,
                 "content": "",
+                "failed_pages": sorted(page_numbers or []),
                 "message": "OCR not available. Install tesseract and pdf2image.",
                 "error": "OCR dependencies missing"
             }
         try:
             poppler_path = os.getenv("POPPLER_PATH", "/opt/homebrew/bin")
-            images: List["Image.Image"] = convert_from_path(
-                file_path, dpi=300, poppler_path=poppler_path
-            )
-            text_chunks: List[str] = []
-            for img in images:
-                text = pytesseract.image_to_string(img)
-                if text:
-                    text_chunks.append(text)
-            content = "\n".join(text_chunks)
+            tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+            if page_numbers is None:
+                page_count = pdfinfo_from_path(file_path, poppler_path=poppler_path)["Pages"]
+                page_numbers = list(range(1, page_count + 1))
+            
+            windows = self._ocr_windows(page_numbers)
+            total_pages = len(page_numbers)
+            page_texts: Dict[int, str] = {}
+            failed_pages: List[int] = []
+            errors: List[str] = []
+            
+            def collect(results: List[Tuple[int, str]]):
+                for page_num, text in results:
+                    page_texts[page_num] = text
+                if progress:
+                    progress(len(page_texts) + len(failed_pages), total_pages)
+            
+            # A window that fails is recorded and the others carry on, so
+            # the caller knows exactly which pages are missing.
+            def fail(window: Tuple[int, int], error: BaseException):
+                failed_pages.extend(range(window[0], window[1] + 1))
+                errors.append(str(error))
+                if progress:
+                    progress(len(page_texts) + len(failed_pages), total_pages)
+            
+            if self.ocr_workers <= 1:
+                for window in windows:
+                    try:
+                        collect(_ocr_pdf_page_range(
+                            file_path, window[0], window[1], self.ocr_dpi, poppler_path, tesseract_cmd
+                        ))
+                    except Exception as e:
+                        fail(window, e)
+            else:
+                # At most one window per worker is in flight, which caps peak
+                # memory at ocr_workers * OCR_WINDOW_PAGES rendered pages.
+                pool = self._get_ocr_pool(self.ocr_workers)
+                pending: Dict[Any, Tuple[int, int]] = {}
+                
+                def drain(done):
+                    for future in done:
+                        window = pending.pop(future)
+                        try:
+                            collect(future.result())
+                        except Exception as e:
+                            fail(window, e)
+                
+                for window in windows:
+                    if len(pending) >= self.ocr_workers:
+                        drain(wait(pending, return_when=FIRST_COMPLETED).done)
+                    pending[pool.submit(
+                        _ocr_pdf_page_range,
+                        file_path, window[0], window[1], self.ocr_dpi, poppler_path, tesseract_cmd
+                    )] = window
+                drain(wait(pending).done)
+            
+            failed_pages.sort()
+            pages = [
+                {"page": page_num, "content": page_texts.get(page_num, "")}
+                for page_num in sorted(page_texts)
+            ]
+            content = "\n".join(page["content"] for page in pages)
             if not content.strip():
                 return {
                     "success": False,
                     "content": "",
-                    "message": "OCR found no text",
-                    "error": "No text content found"
+                    "failed_pages": failed_pages,
+                    "message": f"OCR failed: {errors[0]}" if errors else "OCR found no text",
+                    "error": errors[0] if errors else "No text content found"
                 }
-            return {"success": True, "content": content, "message": "OCR parsed PDF"}
+            return {
+                "success": True,
+                "content": content,
+                "pages": pages,
+                "failed_pages": failed_pages,
+                "message": f"OCR parsed PDF, pages: {len(pages)}",
+                "error": errors[0] if errors else None
+            }
         except Exception as e:
             return {
                 "success": False,
                 "content": "",
+                "failed_pages": sorted(page_numbers or []),
                 "message": f"OCR failed: {str(e)}",
                 "error": str(e)
             }
@@ -0,0 +1,114 @@
+""""""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+from datetime import datetime
+
+ENTRY_FIELDS = ("document_id", "filename", "file_path", "source_path", "chunks_count", "indexed_at")
+
+
+class DocumentHashIndex:
+
+    # Entries live in SQLite rather than an in-memory dict, so every worker
+    # process and the offline indexer see (and never overwrite) each other's
+    # registrations.
+    def __init__(self, index_path: str = "./data/hash_index.sqlite3"):
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(index_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._db = sqlite3.connect(index_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                sha256 TEXT PRIMARY KEY,
+                document_id TEXT NOT NULL UNIQUE,
+                filename TEXT,
+                file_path TEXT,
+                source_path TEXT,
+                chunks_count INTEGER,
+                indexed_at TEXT NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _entry(row: Optional[tuple], sha256: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        entry = dict(zip(ENTRY_FIELDS, row))
+        if sha256 is not None:
+            entry["sha256"] = sha256
+        return entry
+
+    def _write(self, sha256: str, fields: Dict[str, Any], indexed_at: str):
+        # REPLACE also drops an older row of the same document_id, so a
+        # document always maps to exactly one content hash.
+        self._db.execute(
+            f"INSERT OR REPLACE INTO entries (sha256, {', '.join(ENTRY_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                sha256,
+                fields["document_id"],
+                fields.get("filename"),
+                fields.get("file_path"),
+                fields.get("source_path"),
+                fields.get("chunks_count"),
+                fields.get("indexed_at") or indexed_at
+            )
+        )
+
+    def lookup(self, sha256: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(ENTRY_FIELDS)} FROM entries WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return self._entry(row)
+
+    def register(self, sha256: str, document_id: str, **fields: Any) -> Dict[str, Any]:
+        entry = {**fields, "document_id": document_id, "indexed_at": datetime.now().isoformat()}
+        with self._lock:
+            self._write(sha256, entry, entry["indexed_at"])
+            self._db.commit()
+        return entry
+
+    def register_many(self, entries: Dict[str, Dict[str, Any]]):
+        indexed_at = datetime.now().isoformat()
+        with self._lock:
+            for sha256, fields in entries.items():
+                self._write(sha256, {**fields, "indexed_at": None}, indexed_at)
+            self._db.commit()
+
+    def remove(self, sha256: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(ENTRY_FIELDS)} FROM entries WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            self._db.execute("DELETE FROM entries WHERE sha256 = ?", (sha256,))
+            self._db.commit()
+        return self._entry(row)
+
+    def find_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT sha256, {', '.join(ENTRY_FIELDS)} FROM entries WHERE document_id = ?", (document_id,)
+            ).fetchone()
+        return self._entry(row[1:], row[0]) if row else None
+
+    def remove_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT sha256, {', '.join(ENTRY_FIELDS)} FROM entries WHERE document_id = ?", (document_id,)
+            ).fetchone()
+            self._db.execute("DELETE FROM entries WHERE document_id = ?", (document_id,))
+            self._db.commit()
+        return self._entry(row[1:], row[0]) if row else None
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
@@ -0,0 +1,333 @@
+""""""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, Callable, List
+from datetime import datetime, timedelta
+
+JobReporter = Callable[[str, Optional[int], Optional[int]], None]
+JobHandler = Callable[[Dict[str, Any], JobReporter], Dict[str, Any]]
+JobFailureHandler = Callable[[Dict[str, Any], str], None]
+
+JOB_COLUMNS = ("job_id", "status", "created_at", "updated_at", "payload", "stages", "result", "error", "attempts")
+JSON_COLUMNS = ("payload", "stages", "result")
+
+
+class IngestionJobQueue:
+
+    STAGES = ("extract", "split", "embed")
+    PERSIST_INTERVAL = 1.0
+
+    # Jobs live in SQLite so every worker process sees every job. A queued
+    # job is claimed with a guarded UPDATE, so only one process runs it, and
+    # running jobs carry a heartbeat so a job whose process died is queued
+    # again once its lease expires.
+    def __init__(
+        self,
+        handler: JobHandler,
+        db_path: str = "./data/ingestion_jobs.sqlite3",
+        max_workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        on_failed: Optional[JobFailureHandler] = None
+    ):
+        self.handler = handler
+        self.on_failed = on_failed
+        self.db_path = db_path
+        self.max_workers = max_workers or int(os.getenv("INGEST_WORKERS", "2"))
+        self.max_queued = max_queued or int(os.getenv("INGEST_MAX_QUEUED", "1000"))
+        self.lease_seconds = float(os.getenv("INGEST_JOB_LEASE_S", "60"))
+        self.max_attempts = int(os.getenv("INGEST_JOB_MAX_ATTEMPTS", "3"))
+        self.retention = timedelta(hours=float(os.getenv("INGEST_JOB_RETENTION_HOURS", "168")))
+        self.poll_interval = 1.0
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._last_persist: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self):
+        with self._lock:
+            if self._db is None:
+                self._open()
+
+    def _open(self):
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                stages TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                heartbeat REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+            CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+            """
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _encode(job: Dict[str, Any]) -> tuple:
+        return tuple(
+            json.dumps(job.get(column)) if column in JSON_COLUMNS else job.get(column)
+            for column in JOB_COLUMNS
+        )
+
+    @staticmethod
+    def _decode(row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(zip(JOB_COLUMNS, row))
+        for column in JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] is not None else None
+        return job
+
+    def start(self):
+        if self._workers:
+            return
+        self._connect()
+        self._stopping.clear()
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"ingest-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        maintainer = threading.Thread(target=self._maintenance_loop, name="ingest-heartbeat", daemon=True)
+        maintainer.start()
+        self._workers.append(maintainer)
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout=5)
+        self._workers = []
+
+    def _new_stages(self) -> Dict[str, Dict[str, Any]]:
+        return {stage: {"status": "pending", "done": 0, "total": None} for stage in self.STAGES}
+
+    def submit(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        self._connect()
+        now = datetime.now().isoformat()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "status": "queued",
+            "created_at": now,
+            "updated_at": now,
+            "payload": payload,
+            "stages": self._new_stages(),
+            "result": None,
+            "error": None,
+            "attempts": 0
+        }
+        with self._lock:
+            # The limit check and the insert are one statement, so concurrent
+            # submits from several processes cannot overshoot it.
+            inserted = self._db.execute(
+                f"INSERT INTO jobs ({', '.join(JOB_COLUMNS)}) "
+                f"SELECT {', '.join('?' * len(JOB_COLUMNS))} "
+                "WHERE (SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')) < ?",
+                (*self._encode(job), self.max_queued)
+            ).rowcount
+            self._db.commit()
+        if not inserted:
+            return None
+        self._wakeup.set()
+        return job
+
+    def pending_count(self) -> int:
+        self._connect()
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._connect()
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._decode(row)
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        self._connect()
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            while True:
+                row = self._db.execute(
+                    "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+                now = datetime.now().isoformat()
+                claimed = self._db.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, heartbeat = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE job_id = ? AND status = 'queued'",
+                    (self.owner, time.time(), now, row[0])
+                ).rowcount
+                self._db.commit()
+                # Another process got there first; try the next one
+                if claimed:
+                    job = self.get(row[0])
+                    self._running[job["job_id"]] = job
+                    return job
+
+    def _update(self, job: Dict[str, Any], force_persist: bool = False, **fields: Any):
+        with self._lock:
+            job.update(fields)
+            job["updated_at"] = datetime.now().isoformat()
+            last = self._last_persist.get(job["job_id"], 0.0)
+            if force_persist or time.monotonic() - last >= self.PERSIST_INTERVAL:
+                # Only the owner may write, so a job that was re-queued after
+                # its lease expired is not overwritten by the stale worker.
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ?, stages = ?, result = ?, error = ?, heartbeat = ? "
+                    "WHERE job_id = ? AND owner = ?",
+                    (
+                        job["status"], job["updated_at"], json.dumps(job["stages"]),
+                        json.dumps(job["result"]), job["error"], time.time(), job["job_id"], self.owner
+                    )
+                )
+                self._db.commit()
+                self._last_persist[job["job_id"]] = time.monotonic()
+
+    def _reporter(self, job: Dict[str, Any]) -> JobReporter:
+        def report(stage: str, done: Optional[int] = None, total: Optional[int] = None):
+            with self._lock:
+                stages = job["stages"]
+                stage_changed = stages[stage]["status"] != "running"
+                # Reaching a stage means every earlier stage has finished
+                for name in self.STAGES[:self.STAGES.index(stage)]:
+                    stages[name]["status"] = "done"
+                stages[stage]["status"] = "running"
+                if done is not None:
+                    stages[stage]["done"] = done
+                if total is not None:
+                    stages[stage]["total"] = total
+                self._update(job, force_persist=stage_changed)
+        return report
+
+    def _fail(self, job: Dict[str, Any], error: str):
+        if self.on_failed is not None:
+            try:
+                self.on_failed(job["payload"], error)
+            except Exception as e:
+                print(f"job cleanup error ({job['job_id']}): {str(e)}")
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"job claim error: {str(e)}")
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            try:
+                result = self.handler(job["payload"], self._reporter(job))
+                with self._lock:
+                    for stage in job["stages"].values():
+                        stage["status"] = "done"
+                    self._update(job, force_persist=True, status="succeeded", result=result)
+            except Exception as e:
+                with self._lock:
+                    for stage in job["stages"].values():
+                        if stage["status"] == "running":
+                            stage["status"] = "failed"
+                    self._update(job, force_persist=True, status="failed", error=str(e))
+                self._fail(job, str(e))
+            finally:
+                with self._lock:
+                    self._running.pop(job["job_id"], None)
+                    self._last_persist.pop(job["job_id"], None)
+
+    def _maintenance_loop(self):
+        last_purge = 0.0
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                self._heartbeat()
+                self._requeue_expired()
+                if time.monotonic() - last_purge >= 3600:
+                    self._purge_finished()
+                    last_purge = time.monotonic()
+            except Exception as e:
+                print(f"job maintenance error: {str(e)}")
+
+    def _heartbeat(self):
+        with self._lock:
+            if not self._running:
+                return
+            self._db.executemany(
+                "UPDATE jobs SET heartbeat = ? WHERE job_id = ? AND owner = ?",
+                [(time.time(), job_id, self.owner) for job_id in self._running]
+            )
+            self._db.commit()
+
+    def _requeue_expired(self):
+        # Every stage is idempotent (the document id is fixed at submit time
+        # and partial chunks are replaced), so an orphaned job is re-run from
+        # the start; after max_attempts it is failed instead.
+        expired_before = time.time() - self.lease_seconds
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE status = 'running' AND heartbeat < ?",
+                (expired_before,)
+            ).fetchall()
+            abandoned = []
+            for job in map(self._decode, rows):
+                now = datetime.now().isoformat()
+                if job["attempts"] >= self.max_attempts:
+                    error = f"Worker stopped while running the job ({job['attempts']} attempts)"
+                    changed = self._db.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, owner = NULL, updated_at = ? "
+                        "WHERE job_id = ? AND status = 'running' AND heartbeat < ?",
+                        (error, now, job["job_id"], expired_before)
+                    ).rowcount
+                    if changed:
+                        abandoned.append((job, error))
+                else:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'queued', stages = ?, owner = NULL, updated_at = ? "
+                        "WHERE job_id = ? AND status = 'running' AND heartbeat < ?",
+                        (json.dumps(self._new_stages()), now, job["job_id"], expired_before)
+                    )
+            self._db.commit()
+        for job, error in abandoned:
+            self._fail(job, error)
+        if rows:
+            self._wakeup.set()
+
+    def _purge_finished(self):
+        cutoff = (datetime.now() - self.retention).isoformat()
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated_at < ?", (cutoff,)
+            )
+            self._db.commit()
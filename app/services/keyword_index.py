@@ -0,0 +1,207 @@
+""""""
+
+import os
+import re
+import math
+import sqlite3
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+# Identifiers such as "E1042", "A-2231-B" or "v2.3.1" are kept whole (and
+# also split into their parts); runs of CJK characters, which have no
+# spaces, are indexed as unigrams plus bigrams. Words are any other Unicode
+# letters and digits, so "café", "Größe" and Cyrillic text stay intact.
+CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+WORD_CHAR = f"[^\\W_{CJK_RANGES}]"
+WORD_PATTERN = re.compile(f"{WORD_CHAR}+(?:[-_./]{WORD_CHAR}+)*")
+CJK_PATTERN = re.compile(f"[{CJK_RANGES}]+")
+PART_PATTERN = re.compile(r"[-_./]")
+
+# Bump when tokenize() or the chunk keys change; older indexes are rebuilt
+INDEX_VERSION = "2"
+
+
+def tokenize(text: str) -> List[str]:
+    text = text.lower()
+    tokens = []
+    for match in WORD_PATTERN.finditer(text):
+        word = match.group()
+        tokens.append(word)
+        parts = PART_PATTERN.split(word)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    for match in CJK_PATTERN.finditer(text):
+        run = match.group()
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class KeywordIndex:
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, path: str, max_postings: Optional[int] = None):
+        self.path = path
+        # Terms in more chunks than this are skipped at query time; they
+        # carry almost no BM25 weight and would dominate the query cost.
+        self.max_postings = max_postings or int(os.getenv("KEYWORD_MAX_POSTINGS", "50000"))
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.open()
+
+    def open(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                chunk_id TEXT UNIQUE NOT NULL,
+                document_id TEXT NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chunks_document ON chunks (document_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                chunk INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, chunk)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk);
+            CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS totals (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO totals VALUES ('chunks', 0), ('length', 0);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+        if not self._db.execute("SELECT value FROM totals WHERE key = 'chunks'").fetchone()[0]:
+            self._set_version()
+        self._db.commit()
+
+    def _set_version(self):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (INDEX_VERSION,))
+
+    def is_outdated(self) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row is None or row[0] != INDEX_VERSION
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM postings")
+            self._db.execute("DELETE FROM terms")
+            self._db.execute("DELETE FROM chunks")
+            self._db.execute("UPDATE totals SET value = 0")
+            self._db.commit()
+
+    def mark_current(self):
+        with self._lock:
+            self._set_version()
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remove(self, rows: List[Tuple[int, int]]):
+        # rows are (chunk rowid, length); caller holds the lock and commits
+        if not rows:
+            return
+        for rowid, _ in rows:
+            terms = [term for (term,) in self._db.execute("SELECT term FROM postings WHERE chunk = ?", (rowid,))]
+            self._db.executemany("UPDATE terms SET df = df - 1 WHERE term = ?", [(term,) for term in terms])
+            self._db.execute("DELETE FROM postings WHERE chunk = ?", (rowid,))
+            self._db.execute("DELETE FROM chunks WHERE id = ?", (rowid,))
+        self._db.execute("DELETE FROM terms WHERE df <= 0")
+        self._db.execute("UPDATE totals SET value = value - ? WHERE key = 'chunks'", (len(rows),))
+        self._db.execute("UPDATE totals SET value = value - ? WHERE key = 'length'", (sum(length for _, length in rows),))
+
+    def add(self, chunk_ids: List[str], texts: List[str], document_ids: List[str]):
+        with self._lock:
+            # Re-adding a chunk id replaces its postings
+            existing = []
+            for chunk_id in chunk_ids:
+                row = self._db.execute("SELECT id, length FROM chunks WHERE chunk_id = ?", (chunk_id,)).fetchone()
+                if row:
+                    existing.append(row)
+            self._remove(existing)
+
+            total_length = 0
+            for chunk_id, text, document_id in zip(chunk_ids, texts, document_ids):
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                total_length += length
+                rowid = self._db.execute(
+                    "INSERT INTO chunks (chunk_id, document_id, length) VALUES (?, ?, ?)",
+                    (chunk_id, document_id, length)
+                ).lastrowid
+                self._db.executemany(
+                    "INSERT INTO postings (term, chunk, tf) VALUES (?, ?, ?)",
+                    [(term, rowid, tf) for term, tf in counts.items()]
+                )
+                self._db.executemany(
+                    "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                    [(term,) for term in counts]
+                )
+            self._db.execute("UPDATE totals SET value = value + ? WHERE key = 'chunks'", (len(chunk_ids),))
+            self._db.execute("UPDATE totals SET value = value + ? WHERE key = 'length'", (total_length,))
+            self._db.commit()
+
+    def delete_document(self, document_id: str):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, length FROM chunks WHERE document_id = ?", (document_id,)
+            ).fetchall()
+            self._remove(rows)
+            self._db.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT value FROM totals WHERE key = 'chunks'").fetchone()[0]
+
+    def search(self, query: str, k: int, document_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            total_chunks, total_length = [
+                value for (value,) in self._db.execute("SELECT value FROM totals ORDER BY key")
+            ]
+            if total_chunks <= 0:
+                return []
+            avg_length = total_length / total_chunks
+
+            scores: Dict[int, float] = {}
+            for term in terms:
+                row = self._db.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+                if not row or row[0] > self.max_postings:
+                    continue
+                df = row[0]
+                idf = math.log(1 + (total_chunks - df + 0.5) / (df + 0.5))
+                sql = "SELECT p.chunk, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk WHERE p.term = ?"
+                params: Tuple[Any, ...] = (term,)
+                if document_id is not None:
+                    sql += " AND c.document_id = ?"
+                    params = (term, document_id)
+                for rowid, tf, length in self._db.execute(sql, params):
+                    norm = tf + self.K1 * (1 - self.B + self.B * length / avg_length)
+                    scores[rowid] = scores.get(rowid, 0.0) + idf * tf * (self.K1 + 1) / norm
+
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            if not top:
+                return []
+            ids = dict(self._db.execute(
+                f"SELECT id, chunk_id FROM chunks WHERE id IN ({','.join('?' * len(top))})",
+                [rowid for rowid, _ in top]
+            ).fetchall())
+            return [(ids[rowid], score) for rowid, score in top]
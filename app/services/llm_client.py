@@ -0,0 +1,269 @@
+""""""
+
+import os
+import json
+import random
+import asyncio
+import threading
+from typing import List, Dict, Any, AsyncIterator, Optional
+
+import httpx
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class RetryBudget:
+
+    # Retries may add at most `ratio` extra calls per call made, plus a small
+    # reserve for quiet periods, so an upstream outage is not multiplied by
+    # every client retrying every request.
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self._balance = reserve
+        self._lock = threading.Lock()
+
+    def on_call(self):
+        with self._lock:
+            self._balance = min(self.reserve, self._balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class OpenAICompatibleProvider:
+
+    # Groq, vLLM, llama.cpp's server and the local stub (python -m app.llm_stub)
+    # all speak the OpenAI chat completions API.
+    def __init__(self, base_url: str, model: str, api_key: Optional[str] = None, temperature: float = 0.1, max_tokens: int = 1024):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    def _payload(self, messages: List[Dict[str, str]], stream: bool) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stream": stream
+        }
+
+    @staticmethod
+    async def _raise_for_status(response: httpx.Response):
+        if response.status_code < 400:
+            return
+        body = (await response.aread()).decode("utf-8", "replace")[:500]
+        retry_after = response.headers.get("retry-after")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        raise LLMError(
+            f"LLM request failed with {response.status_code}: {body}",
+            status=response.status_code,
+            retryable=response.status_code in RETRYABLE_STATUS,
+            retry_after=retry_after
+        )
+
+    async def complete(self, http: httpx.AsyncClient, messages: List[Dict[str, str]]) -> str:
+        try:
+            response = await http.post(self.url, headers=self.headers, json=self._payload(messages, False))
+        except httpx.TransportError as e:
+            raise LLMError(f"LLM connection error: {str(e)}", retryable=True) from e
+        await self._raise_for_status(response)
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def stream(self, http: httpx.AsyncClient, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        try:
+            async with http.stream("POST", self.url, headers=self.headers, json=self._payload(messages, True)) as response:
+                await self._raise_for_status(response)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        return
+                    content = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+        except httpx.TransportError as e:
+            raise LLMError(f"LLM connection error: {str(e)}", retryable=True) from e
+
+
+class LLMClient:
+
+    def __init__(
+        self,
+        provider,
+        max_in_flight: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry_budget: Optional[RetryBudget] = None
+    ):
+        self.provider = provider
+        self.max_in_flight = max_in_flight or int(os.getenv("LLM_CONCURRENCY", "16"))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT_S", "60"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "3"))
+        self.retry_budget = retry_budget or RetryBudget(ratio=float(os.getenv("LLM_RETRY_BUDGET", "0.2")))
+        # Created on first use, inside the event loop that will use them
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._stats = {"calls": 0, "retries": 0, "budget_exhausted": 0, "timeouts": 0, "errors": 0}
+
+    def _ensure_started(self):
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 10.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_in_flight,
+                    max_keepalive_connections=self.max_in_flight
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        return remaining
+
+    async def _acquire(self, deadline: float):
+        self._ensure_started()
+        await asyncio.wait_for(self._semaphore.acquire(), self._remaining(deadline))
+        self._in_flight += 1
+
+    def _release(self):
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    async def _backoff(self, error: LLMError, attempt: int, deadline: float):
+        # Full jitter, but never less than the server's Retry-After
+        if not error.retryable or attempt >= self.max_retries:
+            raise error
+        if not self.retry_budget.try_spend():
+            self._stats["budget_exhausted"] += 1
+            raise error
+        delay = random.uniform(0, min(8.0, 0.25 * 2 ** attempt))
+        if error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        if delay >= self._remaining(deadline):
+            raise error
+        self._stats["retries"] += 1
+        await asyncio.sleep(delay)
+
+    async def complete(self, messages: List[Dict[str, str]]) -> str:
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        self._stats["calls"] += 1
+        self.retry_budget.on_call()
+        try:
+            await self._acquire(deadline)
+            try:
+                attempt = 0
+                while True:
+                    try:
+                        return await asyncio.wait_for(
+                            self.provider.complete(self._http, messages), self._remaining(deadline)
+                        )
+                    except LLMError as e:
+                        await self._backoff(e, attempt, deadline)
+                        attempt += 1
+            finally:
+                self._release()
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise LLMError(f"LLM call exceeded its {self.timeout:g}s deadline")
+        except LLMError:
+            self._stats["errors"] += 1
+            raise
+
+    async def stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        self._stats["calls"] += 1
+        self.retry_budget.on_call()
+        try:
+            await self._acquire(deadline)
+            try:
+                attempt = 0
+                while True:
+                    emitted = False
+                    tokens = self.provider.stream(self._http, messages)
+                    try:
+                        while True:
+                            try:
+                                token = await asyncio.wait_for(tokens.__anext__(), self._remaining(deadline))
+                            except StopAsyncIteration:
+                                return
+                            emitted = True
+                            yield token
+                    except LLMError as e:
+                        # Once tokens have reached the caller a retry would repeat them
+                        if emitted:
+                            raise
+                        await self._backoff(e, attempt, deadline)
+                        attempt += 1
+                    finally:
+                        await tokens.aclose()
+            finally:
+                self._release()
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise LLMError(f"LLM call exceeded its {self.timeout:g}s deadline")
+        except LLMError:
+            self._stats["errors"] += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "timeout_s": self.timeout,
+            "provider": type(self.provider).__name__
+        }
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+def build_llm_client(provider: Optional[str] = None) -> LLMClient:
+    provider = (provider or os.getenv("LLM_PROVIDER", "groq")).lower()
+    if provider == "fake":
+        from .fake_llm import FakeLLMProvider
+        return LLMClient(FakeLLMProvider())
+    if provider == "openai":
+        return LLMClient(OpenAICompatibleProvider(
+            base_url=os.getenv("LLM_BASE_URL", "http://127.0.0.1:9000/v1"),
+            model=os.getenv("LLM_MODEL", "stub"),
+            api_key=os.getenv("LLM_API_KEY") or None
+        ))
+    if provider != "groq":
+        raise ValueError(f"Unknown LLM_PROVIDER: {provider}")
+
+    groq_api_key = os.getenv("GROQ_API_KEY")
+    if not groq_api_key:
+        raise ValueError("Please set GROQ_API_KEY env var. Get one at https://console.groq.com/")
+    return LLMClient(OpenAICompatibleProvider(
+        base_url=os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1"),
+        model=os.getenv("LLM_MODEL", "llama-3.1-8b-instant"),
+        api_key=groq_api_key
+    ))
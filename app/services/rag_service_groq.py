@@ -1,43 +1,72 @@
 """"""
 
 import os
-from typing import List, Dict, Any, Optional
-from langchain_groq import ChatGroq
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
-from langchain.schema import Document
-import chromadb
+import threading
+from bisect import bisect_right
+from typing import List, Dict, Any, Optional, Callable, Tuple, AsyncIterator, TYPE_CHECKING
 from datetime import datetime
 
+from .embedding_cache import CachedEmbeddings
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_backends import build_base_embeddings, check_parity
+from .answer_cache import CorpusVersion, SemanticAnswerCache
+from .keyword_index import KeywordIndex
+from .context_packer import ContextPacker
+from .corpus_stats import CorpusStats
+
+# Same instructions as langchain's default "stuff" QA prompt for chat models
+ANSWER_SYSTEM_PROMPT = (
+    "Use the following pieces of context to answer the user's question. \n"
+    "If you don't know the answer, just say that you don't know, don't try to make up an answer.\n"
+    "----------------\n"
+    "{context}"
+)
+
+# langchain, chromadb and sentence-transformers (and with them torch) are
+# imported when the service is built, not when this module is imported, so
+# the web app can bind its port before the model is loaded.
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from .llm_client import LLMClient
+
 
 class RAGServiceGroq:
     
-    def __init__(self, persist_directory: str = "./vector_db"):
+    def __init__(self, persist_directory: str = "./vector_db", with_llm: bool = True, data_directory: str = "./data"):
         self.persist_directory = persist_directory
+        self.data_directory = data_directory
+        self.embed_batch_size = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+        
+        from langchain_community.vectorstores import Chroma
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
         
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
+        self.embedding_model_name = "sentence-transformers/all-MiniLM-L6-v2"
+        self.base_embeddings, self.embedding_backend = build_base_embeddings(
+            self.embedding_model_name, normalize=True
         )
+        self.embedding_parity: Optional[Dict[str, Any]] = None
+        self.embeddings = self.base_embeddings
+        if os.getenv("EMBEDDING_CACHE", "1") != "0":
+            # The backend is part of the cache key: ONNX and PyTorch vectors
+            # are close but not identical.
+            self.embeddings = CachedEmbeddings(
+                self.embeddings,
+                model_name=f"{self.embedding_model_name}@{self.embedding_backend}",
+                normalize=True
+            )
+        # Concurrent query embeddings are coalesced into one encode call
+        self.embeddings = EmbeddingBatcher(self.embeddings)
         
         self.vectorstore = Chroma(
             persist_directory=persist_directory,
             embedding_function=self.embeddings
         )
         
-        groq_api_key = os.getenv("GROQ_API_KEY")
-        if not groq_api_key:
-            raise ValueError("Please set GROQ_API_KEY env var. Get one at https://console.groq.com/")
-        
-        self.llm = ChatGroq(
-            groq_api_key=groq_api_key,
-            model_name="llama-3.1-8b-instant",
-            temperature=0.1,
-            max_tokens=1024
-        )
+        # Offline indexing only embeds and writes, so it can run without an LLM
+        self.llm: Optional["LLMClient"] = None
+        if with_llm:
+            from .llm_client import build_llm_client
+            self.llm = build_llm_client()
         
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
@@ -46,51 +75,219 @@ class RAGServiceGroq:
             separators=["\n\n", "\n", " ", ""]
         )
         
-        self.qa_chain = None
-        self._setup_qa_chain()
+        # With packing on, k is the candidate pool; the packer decides how
+        # much of it fits the prompt budget.
+        self.context_packer: Optional[ContextPacker] = None
+        if os.getenv("CONTEXT_PACKING", "1") != "0":
+            self.context_packer = ContextPacker()
+        self.retrieval_k = int(os.getenv("RETRIEVAL_K", "10" if self.context_packer else "5"))
+        # BM25 index kept next to Chroma so exact identifiers, error codes and
+        # part numbers are found even when the embedding misses them.
+        self.keyword_index: Optional[KeywordIndex] = None
+        if os.getenv("HYBRID_SEARCH", "1") != "0":
+            self.keyword_index = KeywordIndex(os.path.join(persist_directory, "keyword_index.sqlite3"))
+        self.hybrid_candidates = int(os.getenv("HYBRID_CANDIDATES", "20"))
+        self.rrf_k = int(os.getenv("RRF_K", "60"))
+        # (corpus version, chunk count); recounted whenever the shared corpus
+        # version moves, so writes from other processes are noticed too
+        self._chunk_count: Optional[Tuple[int, int]] = None
+        self._count_lock = threading.Lock()
+        
+        # Shared with the offline indexer, which is pointed at the same
+        # data directory
+        self.corpus_version = CorpusVersion(os.path.join(data_directory, "corpus_version"))
+        self.corpus_stats = CorpusStats(os.path.join(data_directory, "corpus_stats.sqlite3"))
+        
+        from .document_catalog import DocumentCatalog
+        self.catalog = DocumentCatalog(
+            os.getenv("CATALOG_DATABASE_URL", f"sqlite:///{os.path.join(data_directory, 'catalog.db')}")
+        )
+        self.answer_cache: Optional[SemanticAnswerCache] = None
+        if os.getenv("ANSWER_CACHE", "1") != "0":
+            self.answer_cache = SemanticAnswerCache()
     
-    def _setup_qa_chain(self):
-        try:
-            doc_count = self.vectorstore._collection.count()
-            print(f"DEBUG: vector db docs: {doc_count}")
-            if doc_count > 0:
-                self.qa_chain = RetrievalQA.from_chain_type(
-                    llm=self.llm,
-                    chain_type="stuff",
-                    retriever=self.vectorstore.as_retriever(
-                        search_kwargs={"k": 5}
-                    ),
-                    return_source_documents=True
-                )
-                print("DEBUG: qa chain ready")
-            else:
-                print("DEBUG: vector db empty, skip qa chain")
-        except Exception as e:
-            print(f"DEBUG: qa chain setup error: {str(e)}")
+    def _on_corpus_changed(self):
+        with self._count_lock:
+            self._chunk_count = None
+        self.corpus_version.bump()
+    
+    def _has_documents(self) -> bool:
+        version = self.corpus_version.current()
+        with self._count_lock:
+            if self._chunk_count is None or self._chunk_count[0] != version:
+                self._chunk_count = (version, self.vectorstore._collection.count())
+            return self._chunk_count[1] > 0
+    
+    def _chunk_pages(
+        self, content: str, chunks: List[str], pages: List[Dict[str, Any]]
+    ) -> List[Optional[int]]:
+        # Pages are joined with a single newline during extraction, so each
+        # chunk's offset in the content maps back to the page it starts on.
+        page_starts = []
+        offset = 0
+        for page in pages:
+            page_starts.append(offset)
+            offset += len(page["content"]) + 1
+        
+        chunk_pages: List[Optional[int]] = []
+        cursor = 0
+        for chunk in chunks:
+            position = content.find(chunk, cursor)
+            if position < 0:
+                chunk_pages.append(None)
+                continue
+            cursor = position + 1
+            chunk_pages.append(pages[bisect_right(page_starts, position) - 1]["page"])
+        return chunk_pages
+    
+    def warm_up(self):
+        # One real forward pass so the first user request does not pay for
+        # lazy weight loading and kernel initialisation.
+        self.base_embeddings.embed_query("warm-up")
+        chunk_count = self.vectorstore._collection.count()
+        if self.keyword_index is not None and chunk_count and (
+            not self.keyword_index.count() or self.keyword_index.is_outdated()
+        ):
+            # Vector store written before the keyword index existed, or an
+            # index built with an older tokenizer / chunk key format
+            self.rebuild_keyword_index()
+        if chunk_count and (not self.corpus_stats.get()["total_chunks"] or not self.catalog.count()):
+            # Vector store written before the counters / catalog existed
+            self.rebuild_document_stats()
+        if self.embedding_backend != "torch" and os.getenv("EMBEDDING_PARITY_CHECK", "0") == "1":
+            reference, _ = build_base_embeddings(self.embedding_model_name, normalize=True, backend="torch")
+            self.embedding_parity = check_parity(reference, self.base_embeddings)
+            print(f"embedding parity ({self.embedding_backend}): {self.embedding_parity}")
+    
+    def rebuild_keyword_index(self, page_size: int = 5000) -> int:
+        collection = self.vectorstore._collection
+        self.keyword_index.clear()
+        indexed = 0
+        offset = 0
+        while True:
+            page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            self.keyword_index.add(
+                [self._chunk_key(metadata, chunk_id) for chunk_id, metadata in zip(page["ids"], page["metadatas"])],
+                page["documents"],
+                [metadata.get("document_id", "") for metadata in page["metadatas"]]
+            )
+            indexed += len(page["ids"])
+            offset += page_size
+        self.keyword_index.mark_current()
+        print(f"keyword index rebuilt: {indexed} chunks")
+        return indexed
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics: Dict[str, Any] = {
+            "embedding_backend": self.embedding_backend,
+            "embedding_batcher": self.embeddings.stats()
+        }
+        if self.embedding_parity is not None:
+            metrics["embedding_parity"] = self.embedding_parity
+        if self.llm is not None:
+            metrics["llm"] = self.llm.stats()
+        if self.answer_cache is not None:
+            metrics["answer_cache"] = {
+                **self.answer_cache.stats(),
+                "corpus_version": self.corpus_version.current()
+            }
+        cache = self.embeddings.embeddings
+        if isinstance(cache, CachedEmbeddings):
+            metrics["embedding_cache"] = cache.stats()
+        return metrics
+    
+    @staticmethod
+    def chunk_id(document_id: str, chunk_index: int) -> str:
+        return f"{document_id}:{chunk_index}"
+    
+    def _chunk_key(self, metadata: Dict[str, Any], fallback: str) -> str:
+        # Chunks written before ids were derived from (document_id,
+        # chunk_index) have random ids but still carry both fields, so both
+        # rankings key every chunk the same way.
+        if metadata.get("document_id") is None or metadata.get("chunk_index") is None:
+            return fallback
+        return self.chunk_id(metadata["document_id"], metadata["chunk_index"])
+    
+    def build_chunks(
+        self,
+        content: str,
+        metadata: Dict[str, Any],
+        pages: Optional[List[Dict[str, Any]]] = None
+    ) -> List["Document"]:
+        from langchain.schema import Document
+        
+        chunks = self.text_splitter.split_text(content)
+        chunk_pages = self._chunk_pages(content, chunks, pages) if pages else [None] * len(chunks)
+        
+        # Chunks only carry their position; filename, type, size etc. live
+        # once per document in the catalog and are joined back on read.
+        documents = []
+        for i, chunk in enumerate(chunks):
+            doc_metadata = {
+                "document_id": metadata["document_id"],
+                "chunk_index": i
+            }
+            if chunk_pages[i] is not None:
+                doc_metadata["page"] = chunk_pages[i]
+            documents.append(Document(page_content=chunk, metadata=doc_metadata))
+        return documents
     
-    def add_document(self, content: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    def register_documents(self, documents: List[Dict[str, Any]]):
+        # Catalog rows (see DocumentCatalog) for documents whose chunks are written
+        self.catalog.upsert_many(documents)
+        self.corpus_stats.record_documents([
+            {
+                "document_id": document["document_id"],
+                "type": document["type"],
+                "file_size": document["file_size"],
+                "chunks": document["chunks_count"]
+            }
+            for document in documents
+        ])
+    
+    def mark_document_indexed(self, document_id: str, chunks_count: int):
+        self.catalog.set_status(document_id, "indexed", chunks_count=chunks_count)
+        row = self.catalog.get(document_id)
+        if row is not None:
+            self.corpus_stats.record_documents([{
+                "document_id": document_id,
+                "type": row["type"],
+                "file_size": row["file_size"],
+                "chunks": chunks_count
+            }])
+    
+    def add_chunks(
+        self,
+        documents: List["Document"],
+        progress: Optional[Callable[[str, Optional[int], Optional[int]], None]] = None
+    ) -> Dict[str, Any]:
         try:
-            chunks = self.text_splitter.split_text(content)
-            
-            documents = []
-            for i, chunk in enumerate(chunks):
-                doc_metadata = {
-                    **metadata,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                    "added_at": datetime.now().isoformat()
-                }
-                documents.append(Document(page_content=chunk, metadata=doc_metadata))
+            if progress:
+                progress("embed", 0, len(documents))
             
-            self.vectorstore.add_documents(documents)
+            # Chunk ids are derived from the document id, so writing the same
+            # document again overwrites its chunks instead of duplicating them.
+            for start in range(0, len(documents), self.embed_batch_size):
+                batch = documents[start:start + self.embed_batch_size]
+                ids = [self.chunk_id(doc.metadata["document_id"], doc.metadata["chunk_index"]) for doc in batch]
+                self.vectorstore.add_documents(batch, ids=ids)
+                if self.keyword_index is not None:
+                    self.keyword_index.add(
+                        ids,
+                        [doc.page_content for doc in batch],
+                        [doc.metadata["document_id"] for doc in batch]
+                    )
+                if progress:
+                    progress("embed", start + len(batch), len(documents))
             
-            self._setup_qa_chain()
+            self._on_corpus_changed()
             
             return {
                 "success": True,
-                "message": f"Added document with {len(chunks)} chunks",
-                "chunks_count": len(chunks),
-                "metadata": metadata
+                "message": f"Added {len(documents)} chunks",
+                "chunks_count": len(documents)
             }
             
         except Exception as e:
@@ -100,57 +297,292 @@ class RAGServiceGroq:
                 "error": str(e)
             }
     
-    def query(self, question: str, document_filter: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def add_document(
+        self,
+        content: str,
+        metadata: Dict[str, Any],
+        pages: Optional[List[Dict[str, Any]]] = None,
+        progress: Optional[Callable[[str, Optional[int], Optional[int]], None]] = None
+    ) -> Dict[str, Any]:
         try:
-            if self.vectorstore._collection.count() == 0:
-                return {
-                    "success": False,
-                    "answer": "No documents available. Please upload first.",
-                    "sources": [],
-                    "error": "No documents available"
-                }
-            
-            if not self.qa_chain:
-                self._setup_qa_chain()
+            if progress:
+                progress("split", 0, 1)
+            documents = self.build_chunks(content, metadata, pages)
+            if progress:
+                progress("split", 1, 1)
             
-            if not self.qa_chain:
-                return {
-                    "success": False,
-                    "answer": "QA chain not initialized. Please retry.",
-                    "sources": [],
-                    "error": "QA chain not initialized"
-                }
+            add_result = self.add_chunks(documents, progress=progress)
+            if not add_result["success"]:
+                return add_result
             
-            if document_filter:
-                retriever = self.vectorstore.as_retriever(
-                    search_kwargs={"k": 5, "filter": document_filter}
-                )
-                chain = RetrievalQA.from_chain_type(
-                    llm=self.llm,
-                    chain_type="stuff",
-                    retriever=retriever,
-                    return_source_documents=True,
-                )
-                result = chain({"query": question})
-            else:
-                result = self.qa_chain({"query": question})
-            
-            sources = []
-            if "source_documents" in result:
-                for doc in result["source_documents"]:
-                    sources.append({
-                        "content": doc.page_content[:200] + "...",
-                        "metadata": doc.metadata,
-                        "relevance_score": getattr(doc, 'score', 0.0)
-                    })
+            return {
+                "success": True,
+                "message": f"Added document with {len(documents)} chunks",
+                "chunks_count": len(documents),
+                "metadata": metadata
+            }
             
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Add failed: {str(e)}",
+                "error": str(e)
+            }
+    
+    def count_document_chunks(self, document_id: str) -> int:
+        return len(self.vectorstore._collection.get(where={"document_id": document_id}, include=[])["ids"])
+    
+    def delete_document_chunks(self, document_id: str) -> Dict[str, Any]:
+        try:
+            # Only this document's chunk ids are read and deleted, so the cost
+            # follows the document's size, not the corpus size.
+            ids = self.vectorstore._collection.get(where={"document_id": document_id}, include=[])["ids"]
+            if ids:
+                self.vectorstore._collection.delete(ids=ids)
+            if self.keyword_index is not None:
+                self.keyword_index.delete_document(document_id)
+            self.corpus_stats.remove_document(document_id)
+            if ids:
+                self._on_corpus_changed()
             return {
                 "success": True,
-                "answer": result["result"],
-                "sources": sources,
-                "question": question,
-                "timestamp": datetime.now().isoformat()
+                "message": f"Removed {len(ids)} chunks of document {document_id}",
+                "chunks_deleted": len(ids)
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Remove failed: {str(e)}",
+                "error": str(e)
             }
+    
+    def _vector_search(
+        self,
+        question: str,
+        k: int,
+        document_filter: Optional[Dict[str, Any]],
+        embedding: Optional[List[float]]
+    ) -> List[Tuple["Document", float]]:
+        if embedding is None:
+            return self.vectorstore.similarity_search_with_relevance_scores(
+                question, k=k, filter=document_filter
+            )
+        # Reuse an embedding the caller already computed (e.g. for the answer cache)
+        docs_and_distances = self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+            embedding, k=k, filter=document_filter
+        )
+        relevance = self.vectorstore._select_relevance_score_fn()
+        return [(doc, relevance(distance)) for doc, distance in docs_and_distances]
+    
+    def _fuse(
+        self,
+        vector_hits: List[Tuple["Document", float]],
+        keyword_hits: List[Tuple[str, float]],
+        k: int
+    ) -> List[Tuple["Document", float, Optional[float]]]:
+        from langchain.schema import Document
+        
+        # Reciprocal rank fusion: only ranks matter, so cosine relevance and
+        # BM25 scores never have to be put on the same scale. The vector
+        # relevance is passed along for cutoffs that need an absolute measure.
+        scores: Dict[str, float] = {}
+        relevance: Dict[str, float] = {}
+        documents: Dict[str, "Document"] = {}
+        for rank, (doc, score) in enumerate(vector_hits):
+            chunk_id = self._chunk_key(doc.metadata, getattr(doc, "id", None) or doc.page_content)
+            documents[chunk_id] = doc
+            relevance[chunk_id] = score
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (self.rrf_k + rank + 1)
+        for rank, (chunk_id, _) in enumerate(keyword_hits):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (self.rrf_k + rank + 1)
+        
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        missing = [chunk_id for chunk_id, _ in top if chunk_id not in documents]
+        if missing:
+            collection = self.vectorstore._collection
+            found = collection.get(ids=missing, include=["documents", "metadatas"])
+            for chunk_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+                documents[chunk_id] = Document(page_content=text, metadata=metadata)
+            # Legacy chunks are stored under random ids, so look them up by
+            # the (document_id, chunk_index) their key is made of
+            positions = []
+            for chunk_id in missing:
+                document_id, _, chunk_index = chunk_id.rpartition(":")
+                if chunk_id not in documents and document_id and chunk_index.isdigit():
+                    positions.append({"$and": [
+                        {"document_id": document_id}, {"chunk_index": int(chunk_index)}
+                    ]})
+            if positions:
+                found = collection.get(
+                    where=positions[0] if len(positions) == 1 else {"$or": positions},
+                    include=["documents", "metadatas"]
+                )
+                for chunk_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+                    documents[self._chunk_key(metadata, chunk_id)] = Document(page_content=text, metadata=metadata)
+        return [
+            (documents[chunk_id], score, relevance.get(chunk_id))
+            for chunk_id, score in top if chunk_id in documents
+        ]
+    
+    def _retrieve_scored(
+        self,
+        question: str,
+        k: Optional[int] = None,
+        document_filter: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None
+    ) -> List[Tuple["Document", float, Optional[float]]]:
+        # (document, ranking score, vector relevance or None for keyword-only hits)
+        k = k or self.retrieval_k
+        # The keyword index only knows document ids, so other filters stay vector-only
+        if self.keyword_index is None or (document_filter and set(document_filter) != {"document_id"}):
+            return [
+                (doc, score, score) for doc, score in self._vector_search(question, k, document_filter, embedding)
+            ]
+        
+        candidates = max(k, self.hybrid_candidates)
+        vector_hits = self._vector_search(question, candidates, document_filter, embedding)
+        keyword_hits = self.keyword_index.search(
+            question, candidates, document_id=(document_filter or {}).get("document_id")
+        )
+        return self._fuse(vector_hits, keyword_hits, k)
+    
+    def retrieve(
+        self,
+        question: str,
+        k: Optional[int] = None,
+        document_filter: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None
+    ) -> List[Tuple["Document", float]]:
+        return [
+            (doc, score) for doc, score, _ in self._retrieve_scored(question, k, document_filter, embedding)
+        ]
+    
+    def _answer_messages(self, question: str, passages: List[str]) -> List[Dict[str, str]]:
+        context = "\n\n".join(passages)
+        return [
+            {"role": "system", "content": ANSWER_SYSTEM_PROMPT.format(context=context)},
+            {"role": "user", "content": question}
+        ]
+    
+    def _joined_metadata(self, documents: List["Document"]) -> List[Dict[str, Any]]:
+        rows = self.catalog.get_many([doc.metadata.get("document_id") for doc in documents])
+        joined = []
+        for doc in documents:
+            row = rows.get(doc.metadata.get("document_id"))
+            fields = {}
+            if row is not None:
+                fields = {
+                    "filename": row["filename"],
+                    "type": row["type"],
+                    "file_size": row["file_size"],
+                    "sha256": row["sha256"],
+                    "upload_time": row["upload_time"],
+                    "total_chunks": row["chunks_count"],
+                    # Set when the document finished indexing, as added_at was per chunk
+                    "added_at": row["updated_at"]
+                }
+                if row["file_path"] is not None:
+                    fields["file_path"] = row["file_path"]
+            # Chunks written before normalisation still carry these fields themselves
+            joined.append({**doc.metadata, **fields})
+        return joined
+    
+    def _format_sources(self, docs_and_scores: List[Tuple["Document", float]]) -> List[Dict[str, Any]]:
+        metadatas = self._joined_metadata([doc for doc, _ in docs_and_scores])
+        return [
+            {
+                "content": doc.page_content[:200] + "...",
+                "metadata": metadata,
+                "relevance_score": float(score)
+            }
+            for (doc, score), metadata in zip(docs_and_scores, metadatas)
+        ]
+    
+    def _prepare_answer(
+        self,
+        question: str,
+        document_filter: Optional[Dict[str, Any]] = None,
+        k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        # Everything before the LLM call. Returns either a finished "result"
+        # (no documents, no LLM, cache hit) or what the LLM call needs.
+        if not self._has_documents():
+            return {"result": {
+                "success": False,
+                "answer": "No documents available. Please upload first.",
+                "sources": [],
+                "error": "No documents available"
+            }}
+        
+        if self.llm is None:
+            return {"result": {
+                "success": False,
+                "answer": "LLM not configured.",
+                "sources": [],
+                "error": "LLM not configured"
+            }}
+        
+        embedding = self.embeddings.embed_query(question)
+        version = self.corpus_version.current()
+        filter_key = SemanticAnswerCache.filter_key(document_filter, k or self.retrieval_k)
+        if self.answer_cache is not None:
+            cached = self.answer_cache.lookup(embedding, filter_key, version)
+            if cached is not None:
+                return {"result": {
+                    **cached,
+                    "question": question,
+                    "cached": True,
+                    "timestamp": datetime.now().isoformat()
+                }}
+        
+        # Filter and k are per-call arguments, so nothing is rebuilt per request
+        scored = self._retrieve_scored(
+            question, k=k, document_filter=document_filter, embedding=embedding
+        )
+        docs_and_scores = [(doc, score) for doc, score, _ in scored]
+        if self.context_packer is not None:
+            # Sources list only the chunks that actually went into the prompt
+            packed = self.context_packer.pack(docs_and_scores, relevance=[item[2] for item in scored])
+            docs_and_scores = packed["selected"]
+            passages = [passage["text"] for passage in packed["passages"]]
+        else:
+            passages = [doc.page_content for doc, _ in docs_and_scores]
+        return {
+            "embedding": embedding,
+            "version": version,
+            "filter_key": filter_key,
+            "sources": self._format_sources(docs_and_scores),
+            "messages": self._answer_messages(question, passages)
+        }
+    
+    def _finish_answer(self, question: str, prepared: Dict[str, Any], answer: str) -> Dict[str, Any]:
+        result = {
+            "success": True,
+            "answer": answer,
+            "sources": prepared["sources"],
+            "question": question,
+            "timestamp": datetime.now().isoformat()
+        }
+        if self.answer_cache is not None:
+            self.answer_cache.store(prepared["embedding"], prepared["filter_key"], prepared["version"], result)
+        return result
+    
+    async def query(
+        self,
+        question: str,
+        document_filter: Optional[Dict[str, Any]] = None,
+        k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        from .executors import run_blocking
+        
+        try:
+            # Embedding and vector search are blocking; the LLM call is not
+            prepared = await run_blocking("search", self._prepare_answer, question, document_filter, k)
+            if "result" in prepared:
+                return prepared["result"]
+            
+            answer = await self.llm.complete(prepared["messages"])
+            return self._finish_answer(question, prepared, answer)
             
         except Exception as e:
             return {
@@ -160,18 +592,54 @@ class RAGServiceGroq:
                 "error": str(e)
             }
     
+    async def astream_query(
+        self,
+        question: str,
+        document_filter: Optional[Dict[str, Any]] = None,
+        k: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        # Yields ("sources", [...]), then ("token", text) per chunk, then
+        # ("done", result) where result matches what query() returns.
+        from .executors import run_blocking
+        
+        try:
+            prepared = await run_blocking("search", self._prepare_answer, question, document_filter, k)
+            if "result" in prepared:
+                result = prepared["result"]
+                yield "sources", result.get("sources", [])
+                if result["success"]:
+                    yield "token", result["answer"]
+                yield "done", result
+                return
+            
+            yield "sources", prepared["sources"]
+            parts = []
+            async for token in self.llm.stream(prepared["messages"]):
+                parts.append(token)
+                yield "token", token
+            yield "done", self._finish_answer(question, prepared, "".join(parts))
+            
+        except Exception as e:
+            yield "done", {
+                "success": False,
+                "answer": f"Error: {str(e)}",
+                "sources": [],
+                "error": str(e)
+            }
+    
     def search_similar(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         try:
-            if self.vectorstore._collection.count() == 0:
+            if not self._has_documents():
                 return []
             
             docs = self.vectorstore.similarity_search_with_score(query, k=k)
+            metadatas = self._joined_metadata([doc for doc, _ in docs])
             
             results = []
-            for doc, score in docs:
+            for (doc, score), metadata in zip(docs, metadatas):
                 results.append({
                     "content": doc.page_content,
-                    "metadata": doc.metadata,
+                    "metadata": metadata,
                     "similarity_score": float(score)
                 })
             
@@ -183,22 +651,11 @@ class RAGServiceGroq:
     
     def get_document_stats(self) -> Dict[str, Any]:
         try:
-            collection = self.vectorstore._collection
-            total_docs = collection.count()
-            
-            all_docs = collection.get()
-            metadata_list = all_docs.get("metadatas", [])
-            
-            doc_types = {}
-            for metadata in metadata_list:
-                doc_type = metadata.get("type", "unknown")
-                doc_types[doc_type] = doc_types.get(doc_type, 0) + 1
-            
+            stats = self.corpus_stats.get()
             return {
-                "total_documents": total_docs,
-                "document_types": doc_types,
-                "vector_db_size": total_docs,
-                "last_updated": datetime.now().isoformat()
+                **stats,
+                "vector_db_size": stats["total_chunks"],
+                "last_updated": stats["last_updated"] or datetime.now().isoformat()
             }
             
         except Exception as e:
@@ -208,18 +665,79 @@ class RAGServiceGroq:
                 "error": str(e)
             }
     
+    def rebuild_document_stats(self, page_size: int = 5000) -> Dict[str, Any]:
+        # Full scan of chunk metadata; only for repair, not on the request path
+        collection = self.vectorstore._collection
+        chunk_counts: Dict[str, int] = {}
+        legacy: Dict[str, Dict[str, Any]] = {}
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            for metadata in page["metadatas"]:
+                document_id = metadata.get("document_id", "")
+                chunk_counts[document_id] = chunk_counts.get(document_id, 0) + 1
+                if "filename" in metadata and document_id not in legacy:
+                    legacy[document_id] = metadata
+            offset += page_size
+        
+        document_ids = list(chunk_counts)
+        rows: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(document_ids), 500):
+            rows.update(self.catalog.get_many(document_ids[start:start + 500]))
+        
+        # Documents indexed before the catalog existed are added to it from
+        # the fields their chunks still carry.
+        backfill = []
+        for document_id in document_ids:
+            if document_id in rows:
+                continue
+            metadata = legacy.get(document_id, {})
+            rows[document_id] = {
+                "document_id": document_id,
+                "filename": metadata.get("filename", ""),
+                "type": metadata.get("type", "unknown"),
+                "file_size": metadata.get("file_size") or 0,
+                "sha256": metadata.get("sha256"),
+                "upload_time": metadata.get("upload_time") or datetime.now().isoformat(),
+                "chunks_count": chunk_counts[document_id],
+                "status": "indexed",
+                "error": None
+            }
+            backfill.append(rows[document_id])
+        self.catalog.upsert_many(backfill)
+        
+        self.corpus_stats.reset([
+            {
+                "document_id": document_id,
+                "type": rows[document_id]["type"],
+                "file_size": rows[document_id]["file_size"],
+                "chunks": chunks
+            }
+            for document_id, chunks in chunk_counts.items()
+        ])
+        print(f"document stats rebuilt: {len(document_ids)} documents, {len(backfill)} added to catalog")
+        return self.get_document_stats()
+    
     def clear_all_documents(self) -> Dict[str, Any]:
         try:
             import shutil
+            from langchain_community.vectorstores import Chroma
+            if self.keyword_index is not None:
+                self.keyword_index.close()
             if os.path.exists(self.persist_directory):
                 shutil.rmtree(self.persist_directory)
+            if self.keyword_index is not None:
+                self.keyword_index.open()
             
             self.vectorstore = Chroma(
                 persist_directory=self.persist_directory,
                 embedding_function=self.embeddings
             )
-            
-            self.qa_chain = None
+            self.corpus_stats.reset()
+            self.catalog.clear()
+            self._on_corpus_changed()
             
             return {
                 "success": True,
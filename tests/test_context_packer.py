@@ -0,0 +1,54 @@
+""""""
+
+from types import SimpleNamespace
+
+from app.services.context_packer import ContextPacker
+
+
+def _doc(document_id: str, text: str):
+    return SimpleNamespace(page_content=text, metadata={"document_id": document_id, "chunk_index": 0})
+
+
+def _texts(packed):
+    return [doc.page_content for doc, _ in packed["selected"]]
+
+
+def test_low_relevance_candidate_is_dropped_from_fused_results():
+    packer = ContextPacker(token_budget=1000, min_score_ratio=0.3, diversity=0.0)
+    # RRF scores of neighbouring ranks are nearly equal, so only the vector
+    # relevance tells the off-topic chunk apart.
+    docs_and_scores = [
+        (_doc("a", "The warranty covers parts for two years."), 1 / 61 + 1 / 62),
+        (_doc("b", "Labour is covered for the first year."), 1 / 62 + 1 / 61),
+        (_doc("c", "The cafeteria opens at eight."), 1 / 63)
+    ]
+
+    packed = packer.pack(docs_and_scores, relevance=[0.82, 0.79, 0.12])
+
+    assert "The cafeteria opens at eight." not in _texts(packed)
+    assert len(packed["selected"]) == 2
+    assert packed["dropped"] == 1
+
+
+def test_keyword_only_hits_are_kept():
+    packer = ContextPacker(token_budget=1000, min_score_ratio=0.3, diversity=0.0)
+    docs_and_scores = [
+        (_doc("a", "The warranty covers parts for two years."), 1 / 61),
+        (_doc("b", "Error code E1042 means the pump is blocked."), 1 / 62)
+    ]
+
+    packed = packer.pack(docs_and_scores, relevance=[0.82, None])
+
+    assert len(packed["selected"]) == 2
+
+
+def test_scores_are_relevance_without_fusion():
+    packer = ContextPacker(token_budget=1000, min_score_ratio=0.3, diversity=0.0)
+    docs_and_scores = [
+        (_doc("a", "The warranty covers parts for two years."), 0.8),
+        (_doc("c", "The cafeteria opens at eight."), 0.1)
+    ]
+
+    packed = packer.pack(docs_and_scores)
+
+    assert _texts(packed) == ["The warranty covers parts for two years."]
@@ -0,0 +1,63 @@
+""""""
+
+import json
+import base64
+
+import pytest
+
+from app.services.document_catalog import DocumentCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = DocumentCatalog(f"sqlite:///{tmp_path / 'catalog.db'}")
+    for i, status in enumerate(["queued", "indexing", "indexed"]):
+        catalog.upsert(
+            f"doc-{i}",
+            filename=f"file-{i}.txt",
+            type="text/plain",
+            file_size=100 * i,
+            upload_time=f"2024-01-0{i + 1}T00:00:00",
+            status=status
+        )
+    return catalog
+
+
+def _cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii")
+
+
+def test_pages_follow_the_cursor(catalog):
+    first = catalog.list(limit=2, sort="file_size")
+    second = catalog.list(limit=2, sort="file_size", cursor=first["next_cursor"])
+
+    assert [row["document_id"] for row in first["documents"]] == ["doc-2", "doc-1"]
+    assert [row["document_id"] for row in second["documents"]] == ["doc-0"]
+    assert second["next_cursor"] is None
+
+
+@pytest.mark.parametrize("value", [
+    [{"a": 1}, "doc-1"],
+    ["100", "doc-1"],
+    [True, "doc-1"],
+    [100, ["doc-1"]],
+    [100],
+])
+def test_malformed_cursor_is_rejected(catalog, value):
+    with pytest.raises(ValueError):
+        catalog.list(sort="file_size", cursor=_cursor(value))
+
+
+def test_cursor_from_another_sort_is_rejected(catalog):
+    cursor = catalog.list(limit=1, sort="file_size")["next_cursor"]
+
+    with pytest.raises(ValueError):
+        catalog.list(sort="filename", cursor=cursor)
+
+
+def test_queued_documents_are_listed(catalog):
+    page = catalog.list(status="queued")
+
+    assert [row["document_id"] for row in page["documents"]] == ["doc-0"]
+    assert catalog.remove("doc-0", status="indexed") is False
+    assert catalog.remove("doc-0", status="queued") is True
@@ -0,0 +1,82 @@
+""""""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import chat
+from app.dependencies import get_rag_service
+from app.services.fake_llm import FakeLLMProvider
+from app.services.llm_client import LLMClient
+from app.services.rag_service_groq import RAGServiceGroq
+
+QUESTION = "What does the warranty cover?"
+ANSWER = f"Found 2 passages for: {QUESTION}"
+
+
+def _service() -> RAGServiceGroq:
+    # Everything before the LLM call is stubbed, so no embedding model or
+    # vector store is loaded.
+    service = RAGServiceGroq.__new__(RAGServiceGroq)
+    service.llm = LLMClient(FakeLLMProvider(response="Found {sources} passages for: {question}", token_delay_ms=0))
+    service.embeddings = SimpleNamespace(embed_query=lambda text: [1.0, 0.0])
+    service.corpus_version = SimpleNamespace(current=lambda: 1)
+    service.catalog = SimpleNamespace(get_many=lambda document_ids: {})
+    service.answer_cache = None
+    service.context_packer = None
+    service.retrieval_k = 2
+    service._has_documents = lambda: True
+    service._retrieve_scored = lambda question, k=None, document_filter=None, embedding=None: [
+        (SimpleNamespace(page_content="Parts are covered for two years.", metadata={"document_id": "doc-1"}), 0.9, 0.9),
+        (SimpleNamespace(page_content="Labour is covered for one year.", metadata={"document_id": "doc-1"}), 0.8, 0.8)
+    ]
+    return service
+
+
+def test_query_returns_fake_answer():
+    result = asyncio.run(_service().query(QUESTION))
+
+    assert result["success"] is True
+    assert result["answer"] == ANSWER
+    assert [source["relevance_score"] for source in result["sources"]] == [0.9, 0.8]
+
+
+def test_astream_query_yields_sources_tokens_done():
+    async def collect():
+        return [event async for event in _service().astream_query(QUESTION)]
+
+    events = asyncio.run(collect())
+    names = [name for name, _ in events]
+
+    assert names[0] == "sources" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+    assert len(events[0][1]) == 2
+    assert "".join(data for name, data in events if name == "token") == ANSWER
+    assert events[-1][1]["answer"] == ANSWER
+
+
+def test_ask_stream_sends_sse_events():
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.dependency_overrides[get_rag_service] = _service
+
+    response = TestClient(app).post("/chat/ask/stream", json={"question": QUESTION})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event_line, data_line = block.split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    names = [name for name, _ in events]
+    assert names[0] == "sources" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+    assert "".join(data for name, data in events if name == "token") == ANSWER
+    done = events[-1][1]
+    assert done["success"] is True
+    assert done["answer"] == ANSWER
+    assert done["question"] == QUESTION
+    assert "sources" not in done